@@ -0,0 +1,138 @@
+import os
+import json
+import wave
+import threading
+
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+SOUND_EXTS = ('.wav',)
+#2: runtime quarantines are no longer persisted, so older manifests are re-inspected once
+MANIFEST_VERSION = 2
+
+
+def inspect(path, kind):
+    info = {'w': None, 'h': None, 'duration': None, 'frames': None, 'valid': True, 'reason': None}
+    try:
+        if kind == 'sound':
+            with wave.open(path, 'rb') as wf:
+                info['duration'] = wf.getnframes() / wf.getframerate()
+        else:
+            from PIL import Image
+            with Image.open(path) as img:
+                info['w'], info['h'] = img.size
+                info['frames'] = getattr(img, 'n_frames', 1)
+                img.verify()
+    except Exception as e:
+        info['valid'] = False
+        info['reason'] = f"{type(e).__name__}: {e}"
+    return info
+
+
+class AssetIndex:
+    # on-disk manifest of the asset folders; only files whose size or mtime changed are re-inspected
+    def __init__(self, dirs, manifest, on_change=None):
+        self.dirs = dirs
+        self.manifest = manifest
+        self.on_change = on_change
+        self.entries = {}
+        self.dir_stamps = {}
+        #paths that failed at runtime; kept for this session only, since the failure may not be the file's fault
+        self.quarantined = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.inspected = 0
+        self.read()
+
+    def read(self):
+        try:
+            with open(self.manifest) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def write(self):
+        tmp = self.manifest + ".tmp"
+        try:
+            with self.lock:
+                data = {'version': MANIFEST_VERSION, 'entries': dict(self.entries)}
+            with open(tmp, 'w') as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.manifest)
+        except OSError:
+            pass
+
+    def scan(self, kinds=None):
+        changed = False
+        added, removed = {}, {}
+        for kind, (d, exts) in self.dirs.items():
+            if kinds and kind not in kinds:
+                continue
+            try:
+                self.dir_stamps[kind] = os.stat(d).st_mtime_ns
+                found = {}
+                with os.scandir(d) as it:
+                    for e in it:
+                        if e.is_file() and e.name.lower().endswith(exts):
+                            found[os.path.join(d, e.name)] = e.stat()
+            except OSError:
+                self.dir_stamps[kind] = None
+                found = {}
+            with self.lock:
+                known = {p for p, v in self.entries.items() if v['kind'] == kind}
+            for p, st in found.items():
+                old = self.entries.get(p)
+                if old and old['size'] == st.st_size and old['mtime'] == st.st_mtime_ns:
+                    continue
+                info = inspect(p, kind)
+                info.update(kind=kind, size=st.st_size, mtime=st.st_mtime_ns)
+                self.inspected += 1
+                with self.lock:
+                    # a rewritten file gets another chance
+                    was = bool(old and old['valid']) and self.quarantined.pop(p, None) is None
+                    self.entries[p] = info
+                changed = True
+                if info['valid'] and not was:
+                    added.setdefault(kind, []).append(p)
+                elif was and not info['valid']:
+                    removed.setdefault(kind, []).append(p)
+            for p in known - found.keys():
+                with self.lock:
+                    old = self.entries.pop(p)
+                    was = old['valid'] and self.quarantined.pop(p, None) is None
+                changed = True
+                if was:
+                    removed.setdefault(kind, []).append(p)
+        if changed:
+            self.write()
+        return added, removed
+
+    def paths(self, kind):
+        with self.lock:
+            return sorted(p for p, v in self.entries.items()
+                          if v['kind'] == kind and v['valid'] and p not in self.quarantined)
+
+    def quarantine(self, path, reason="failed to load"):
+        # hidden until restart or until the file changes; the manifest keeps what inspect() found
+        with self.lock:
+            e = self.entries.get(path)
+            if e is None or not e['valid'] or path in self.quarantined:
+                return False
+            self.quarantined[path] = reason
+        return True
+
+    def watch(self, interval):
+        # a stat per folder per interval; a folder is only listed again when its mtime moves
+        while not self.stop.wait(interval):
+            kinds = []
+            for kind, (d, _) in self.dirs.items():
+                try:
+                    stamp = os.stat(d).st_mtime_ns
+                except OSError:
+                    stamp = None
+                if stamp != self.dir_stamps.get(kind):
+                    kinds.append(kind)
+            if kinds:
+                added, removed = self.scan(kinds)
+                if (added or removed) and self.on_change:
+                    self.on_change(added, removed)
@@ -0,0 +1,230 @@
+import sys
+import time
+import wave
+import threading
+
+import numpy as np
+
+import synth
+
+RATE = synth.RATE
+CHANNELS = 2
+MAX_VOICES = 8
+
+
+def decode_wav(f):
+    with wave.open(f, 'rb') as wf:
+        n_chan, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    if width == 1:
+        x = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        x = np.frombuffer(raw, '<i2').astype(np.float32) / 32768
+    elif width == 3:
+        b = np.frombuffer(raw, np.uint8).reshape(-1, 3).astype(np.int32)
+        x = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32) / 8388608
+    elif width == 4:
+        x = np.frombuffer(raw, '<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported sample width {width}")
+    return conform(x.reshape(-1, n_chan), rate)
+
+
+def conform(x, rate):
+    # any channel count and rate -> float32 stereo at RATE
+    if x.ndim == 1:
+        x = x[:, None]
+    if x.shape[1] == 1:
+        x = np.repeat(x, CHANNELS, axis=1)
+    elif x.shape[1] > CHANNELS:
+        x = x[:, :CHANNELS]
+    if rate != RATE and len(x):
+        src = np.arange(len(x)) / rate
+        dst = np.arange(int(len(x) * RATE / rate)) / RATE
+        x = np.stack([np.interp(dst, src, x[:, i]) for i in range(CHANNELS)], axis=1)
+    return np.ascontiguousarray(x, dtype=np.float32)
+
+
+class AudioBank:
+    # every sound decoded once into PCM; "synth:<name>" keys are rendered procedurally
+    def __init__(self):
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def load(self, paths):
+        for p in list(paths):
+            try:
+                self.get(p)
+            except Exception:
+                pass
+
+    def get(self, key):
+        buf = self.buffers.get(key)
+        if buf is None:
+            if key.startswith('synth:'):
+                buf = conform(synth.render(key[6:]).astype(np.float32) / 32768, synth.RATE)
+            else:
+                buf = decode_wav(key)
+            with self.lock:
+                buf = self.buffers.setdefault(key, buf)
+        return buf
+
+    def nbytes(self):
+        return sum(b.nbytes for b in self.buffers.values())
+
+
+class Voice:
+    def __init__(self, buf, start, gain):
+        self.buf = buf
+        self.start = start
+        self.gain = gain
+
+    def remaining(self, now):
+        return len(self.buf) - int((now - self.start) * RATE)
+
+
+class Mixer:
+    # sums the live voices from their current playheads into one stream for a single-voice backend
+    def __init__(self, backend, max_voices=MAX_VOICES):
+        self.backend = backend
+        self.max_voices = max_voices
+        self.voices = []
+        self.lock = threading.Lock()
+
+    def play(self, buf, gain=1.0):
+        now = time.monotonic()
+        v = Voice(buf, now, gain)
+        with self.lock:
+            self.voices = [x for x in self.voices if x.remaining(now) > 0][-(self.max_voices - 1):]
+            self.voices.append(v)
+            pcm = self.render(now)
+        self.backend.play(pcm, now)
+        return v
+
+    def stop(self, v):
+        if v is None:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if v not in self.voices:
+                return
+            self.voices = [x for x in self.voices if x is not v and x.remaining(now) > 0]
+            pcm = self.render(now) if self.voices else None
+        if pcm is None:
+            self.backend.stop(now)
+        else:
+            self.backend.play(pcm, now)
+
+    def stop_all(self):
+        with self.lock:
+            self.voices = []
+        self.backend.stop(time.monotonic())
+
+    def render(self, now):
+        n = max((x.remaining(now) for x in self.voices), default=0)
+        out = np.zeros((max(n, 0), CHANNELS), np.float32)
+        for x in self.voices:
+            seg = x.buf[len(x.buf) - x.remaining(now):]
+            out[:len(seg)] += seg * x.gain
+        return (np.clip(out, -1.0, 1.0) * 32767).astype('<i2')
+
+
+class NullBackend:
+    def __init__(self):
+        self.plays = 0
+        self.frames = 0
+
+    def play(self, pcm, at):
+        self.plays += 1
+        self.frames += len(pcm)
+
+    def stop(self, at):
+        pass
+
+    def close(self):
+        pass
+
+
+class WavFileBackend:
+    # writes exactly what would have been heard: each new mix replaces the tail of the timeline
+    def __init__(self, path):
+        self.path = path
+        self.origin = None
+        self.chunks = []
+        self.lock = threading.Lock()
+
+    def offset(self, at):
+        if self.origin is None:
+            self.origin = at
+        return int((at - self.origin) * RATE)
+
+    def play(self, pcm, at):
+        with self.lock:
+            off = self.offset(at)
+            self.cut(off)
+            self.chunks.append((off, pcm))
+
+    def stop(self, at):
+        with self.lock:
+            self.cut(self.offset(at))
+
+    def cut(self, off):
+        self.chunks = [(o, p[:max(0, off - o)]) for o, p in self.chunks if o < off]
+
+    def close(self):
+        with self.lock:
+            end = max((o + len(p) for o, p in self.chunks), default=0)
+            out = np.zeros((end, CHANNELS), '<i2')
+            for o, p in self.chunks:
+                out[o:o + len(p)] = p
+        with wave.open(self.path, 'wb') as wf:
+            wf.setnchannels(CHANNELS)
+            wf.setsampwidth(2)
+            wf.setframerate(RATE)
+            wf.writeframes(out.tobytes())
+
+
+class WinsoundBackend:
+    # winsound cannot play memory images asynchronously, so a worker plays them synchronously
+    # and a PlaySound(None) from the caller cuts the current one short
+    def __init__(self):
+        import winsound
+        self.ws = winsound
+        self.pending = None
+        self.ready = threading.Event()
+        threading.Thread(target=self.loop, daemon=True).start()
+
+    def play(self, pcm, at):
+        self.pending = synth.wav_bytes(pcm, RATE, CHANNELS)
+        self.ws.PlaySound(None, 0)
+        self.ready.set()
+
+    def stop(self, at):
+        self.pending = None
+        self.ws.PlaySound(None, 0)
+
+    def loop(self):
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            data, self.pending = self.pending, None
+            if data:
+                try:
+                    self.ws.PlaySound(data, self.ws.SND_MEMORY | self.ws.SND_NODEFAULT)
+                except RuntimeError:
+                    pass
+
+    def close(self):
+        self.stop(None)
+
+
+def make_backend(name=None):
+    if name is None:
+        name = "winsound" if sys.platform == "win32" else "null"
+    if name == "winsound":
+        return WinsoundBackend()
+    if name == "null":
+        return NullBackend()
+    if name.startswith("wav:"):
+        return WavFileBackend(name[4:])
+    raise ValueError(f"unknown audio backend {name!r}")
@@ -0,0 +1,185 @@
+# pre-decodes images into a raw RGBA blob that is memory-mapped at trigger time
+# usage: python bake.py [WxH ...]   (defaults to the primary screen size)
+import os
+import sys
+import glob
+import json
+import mmap
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+BAKE_PREFIX = "nudge_bake"
+BAKE_INDEX = "nudge_bake.json"
+BAKE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+BAKE_VERSION = 1
+
+
+def cover_size(size, screen):
+    w, h = size
+    s_w, s_h = screen
+    a_i = w / h
+    if a_i > s_w / s_h:
+        return int(s_h * a_i), s_h
+    return s_w, int(s_w / a_i)
+
+
+def key(path, size, fit):
+    return f"{path}|{size[0]}x{size[1]}|{fit}"
+
+
+def target_size(src, size, fit):
+    return cover_size(src, size) if fit == 'cover' else size
+
+
+def bake_one(job):
+    # runs in a worker process and writes straight into its reserved slice of the blob
+    from PIL import Image
+    path, size, fit, blob, off = job
+    with Image.open(path) as img:
+        img = img.convert('RGBA')
+        img = img.resize(target_size(img.size, size, fit), Image.Resampling.LANCZOS)
+    data = img.tobytes()
+    with open(blob, 'r+b') as f:
+        f.seek(off)
+        f.write(data)
+    return img.width, img.height, len(data)
+
+
+class BakedImages:
+    # images handed out are zero-copy views into the mapping, so a mapping is never closed or
+    # truncated while in use; compaction writes a new generation of the blob instead
+    def __init__(self, index=BAKE_INDEX, prefix=BAKE_PREFIX):
+        self.index_path = index
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.blob = None
+        self.gen = 0
+        self.entries = {}
+        self.mm = None
+        self.open()
+
+    def open(self):
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get('version') == BAKE_VERSION:
+                self.blob, self.gen, self.entries = data['blob'], data['gen'], data['entries']
+        except (OSError, ValueError, KeyError):
+            pass
+        self.remap()
+        for f in glob.glob(f"{self.prefix}.*.bin"):
+            if f != self.blob:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+
+    def remap(self):
+        self.mm = None
+        if not self.blob:
+            return
+        try:
+            with open(self.blob, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def fresh(self, path, e):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return e['src_size'] == st.st_size and e['src_mtime'] == st.st_mtime_ns
+
+    def get(self, path, size, fit='cover'):
+        with self.lock:
+            e = self.entries.get(key(path, size, fit))
+            mm = self.mm
+        if e is None or mm is None or e['off'] + e['n'] > len(mm) or not self.fresh(path, e):
+            return None
+        from PIL import Image
+        view = memoryview(mm)[e['off']:e['off'] + e['n']]
+        return Image.frombuffer('RGBA', (e['w'], e['h']), view, 'raw', 'RGBA', 0, 1)
+
+    def bake(self, jobs, workers=BAKE_WORKERS):
+        # jobs: (path, size, fit); only missing or stale entries are rendered
+        with self.lock:
+            keep, todo = {}, []
+            for path, size, fit in jobs:
+                k = key(path, size, fit)
+                e = self.entries.get(k)
+                if e and self.fresh(path, e):
+                    keep[k] = e
+                elif (path, size, fit) not in todo:
+                    todo.append((path, size, fit))
+            if not todo and len(keep) == len(self.entries):
+                return 0
+            live = sum(e['n'] for e in keep.values())
+            end = os.path.getsize(self.blob) if self.blob and os.path.exists(self.blob) else 0
+            blob = self.blob
+            #a missing or unmappable blob starts a new generation instead of being written into
+            if blob is None or self.mm is None or not os.path.exists(blob) or end > 2 * live + (64 << 20):
+                keep, blob, end = self.compact(keep)
+
+        slots, done = [], 0
+        for path, size, fit in todo:
+            try:
+                from PIL import Image
+                with Image.open(path) as img:
+                    w, h = target_size(img.size, size, fit)
+            except Exception:
+                continue
+            slots.append((path, size, fit, blob, end))
+            end += w * h * 4
+        if slots:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                for job, fut in [(job, ex.submit(bake_one, job)) for job in slots]:
+                    path, size, fit, _, off = job
+                    try:
+                        w, h, n = fut.result()
+                        st = os.stat(path)
+                    except Exception:
+                        continue
+                    keep[key(path, size, fit)] = {'off': off, 'n': n, 'w': w, 'h': h, 'src_size': st.st_size, 'src_mtime': st.st_mtime_ns}
+                    done += 1
+
+        with self.lock:
+            self.blob, self.entries = blob, keep
+            tmp = self.index_path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'version': BAKE_VERSION, 'blob': self.blob, 'gen': self.gen, 'entries': self.entries}, f)
+            os.replace(tmp, self.index_path)
+            self.remap()
+        return done
+
+    def compact(self, keep):
+        # copy the live entries into a new generation, packed from offset 0
+        self.gen += 1
+        blob = f"{self.prefix}.{self.gen}.bin"
+        out_keep = {}
+        off = 0
+        with open(blob, 'wb') as out:
+            for k, e in keep.items():
+                if self.mm is None or e['off'] + e['n'] > len(self.mm):
+                    continue
+                out.write(self.mm[e['off']:e['off'] + e['n']])
+                out_keep[k] = dict(e, off=off)
+                off += e['n']
+        return out_keep, blob, off
+
+
+if __name__ == "__main__":
+    import time
+    import nudge
+    if len(sys.argv) > 1:
+        screens = [tuple(int(v) for v in a.lower().split('x')) for a in sys.argv[1:]]
+    else:
+        import tkinter as tk
+        r = tk.Tk()
+        screens = [(r.winfo_screenwidth(), r.winfo_screenheight())]
+        r.destroy()
+    m = nudge.Manager(None, kb_c=object())
+    m.load_assets()
+    t = time.perf_counter()
+    n = BakedImages().bake(nudge.bake_jobs(m.i_paths, m.e_paths, screens))
+    print(f"baked {n} images for {screens} in {time.perf_counter() - t:.2f}s")
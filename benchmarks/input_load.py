@@ -0,0 +1,147 @@
+# replays synthetic or recorded input against Manager with a fake event queue, no hooks or win32 needed
+# usage: python benchmarks/input_load.py [--duration 10] [--mouse-hz 1000] [--keys 15] [--mode input|hazard]
+#        python benchmarks/input_load.py --record input.jsonl   (one {"t", "kind", "x", "y"} object per line)
+import os
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+import collections
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+import nudge
+
+
+class NullKeyboard:
+    def type(self, s): pass
+    def press(self, k): pass
+    def release(self, k): pass
+
+
+class FakeGUI:
+    # consumes the queue like GUI.process_queue and finishes each event after `hold` seconds
+    def __init__(self, m, hold):
+        self.m = m
+        self.hold = hold
+        self.counts = collections.Counter()
+        self.stopped = threading.Event()
+        self.t = threading.Thread(target=self.loop, daemon=True)
+
+    def loop(self):
+        while not self.stopped.is_set():
+            try:
+                task = self.m.q.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            event = task.get('event')
+            self.counts[event] += 1
+            span = task.get('span')
+            if span:
+                for stage in ('dispatched', 'handled', 'first_frame'):
+                    span.mark(stage)
+            threading.Timer(self.hold, self.m.finish_event, args=(event,)).start()
+
+
+def mouse_stream(duration, hz, burst=0.5, gap=0.5):
+    # bursts of movement at the device polling rate separated by idle gaps
+    t, x, y = 0.0, 960.0, 540.0
+    while t < duration:
+        end = min(duration, t + burst)
+        while t < end:
+            x += random.uniform(-3, 3)
+            y += random.uniform(-3, 3)
+            yield t, 'move', int(x), int(y)
+            t += 1.0 / hz
+        t += gap
+
+
+def key_stream(duration, rate):
+    t = 0.0
+    while t < duration:
+        yield t, 'key', 0, 0
+        t += random.expovariate(rate)
+
+
+def load_record(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                e = json.loads(line)
+                yield e['t'], e['kind'], e.get('x', 0), e.get('y', 0)
+
+
+def replay(m, stream, lat, fast):
+    start = time.perf_counter()
+    for t, kind, x, y in stream:
+        if not fast:
+            delay = start + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter_ns()
+        if kind == 'key':
+            m.on_press(None)
+        else:
+            m.update_mouse_pos(x, y)
+            m.on_mouse()
+        lat[kind].append(time.perf_counter_ns() - t0)
+
+
+def pct(xs, p):
+    return xs[min(len(xs) - 1, int(len(xs) * p))] if xs else 0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--duration', type=float, default=10.0)
+    ap.add_argument('--mouse-hz', type=float, default=1000.0)
+    ap.add_argument('--keys', type=float, default=15.0)
+    ap.add_argument('--mode', choices=('input', 'hazard'), default=nudge.TRIGGER_MODE)
+    ap.add_argument('--hold', type=float, default=0.5, help="seconds each event keeps the manager busy")
+    ap.add_argument('--record', help="replay a recorded JSON-lines input stream instead")
+    ap.add_argument('--fast', action='store_true', help="replay as fast as possible instead of in real time")
+    ap.add_argument('--seed', type=int)
+    args = ap.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    #no prepare(): the input path needs no assets, and scanning or baking would rewrite the app's manifest and bake files
+    m = nudge.Manager(queue.Queue(), kb_c=NullKeyboard())
+    m.tracer.jsonl = m.tracer.prom = None
+    m.mode = args.mode
+    gui = FakeGUI(m, args.hold)
+    gui.t.start()
+    m.arm()
+
+    lat = collections.defaultdict(list)
+    if args.record:
+        streams = [load_record(args.record)]
+    else:
+        streams = [mouse_stream(args.duration, args.mouse_hz), key_stream(args.duration, args.keys)]
+    threads = [threading.Thread(target=replay, args=(m, s, lat, args.fast)) for s in streams]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    wall = time.perf_counter() - t0
+    m.is_active = False
+    gui.stopped.set()
+
+    total = sum(len(v) for v in lat.values())
+    print(f"mode={m.mode} wall={wall:.2f}s callbacks={total} ({total / wall:,.0f}/s)")
+    for kind, xs in sorted(lat.items()):
+        xs.sort()
+        print(f"  {kind:>5}: n={len(xs)} p50={pct(xs, 0.5) / 1000:.2f}us p99={pct(xs, 0.99) / 1000:.2f}us max={xs[-1] / 1000:.2f}us")
+    print(f"slot claims: attempts={m.claims} conflicts={m.conflicts} ({m.conflicts / max(1, m.claims):.1%})")
+    minutes = wall / 60
+    print("triggers per minute:")
+    for event, n in gui.counts.most_common():
+        print(f"  {event:>18}: {n / minutes:8.2f}")
+    print("trigger path:")
+    print(m.tracer.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# measures queue-to-handler latency of the old 50 ms poll against the event-driven wakeup
+# usage: python benchmarks/wakeup_latency.py [events] [burst]
+# needs a display (real or virtual); no reference numbers are recorded here, so run it on the target machine
+import os
+import sys
+import time
+import queue
+import random
+import threading
+import statistics
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from nudge import EventQueue
+
+POLL_MS = 50
+
+
+def producer(q, n, burst, done):
+    for _ in range(n // burst):
+        time.sleep(random.uniform(0.01, 0.2))
+        for _ in range(burst):
+            q.put({'event': 'bench', 'queued': time.perf_counter()})
+    done.set()
+
+
+def run_poll(n, burst):
+    # the original loop: one task per tick, re-armed every POLL_MS
+    root = tk.Tk(); root.withdraw()
+    q, lat, done = queue.Queue(), [], threading.Event()
+
+    def process_queue():
+        try:
+            task = q.get_nowait()
+            lat.append(time.perf_counter() - task['queued'])
+        except queue.Empty:
+            if done.is_set():
+                root.quit()
+                return
+        root.after(POLL_MS, process_queue)
+
+    threading.Thread(target=producer, args=(q, n, burst, done), daemon=True).start()
+    process_queue()
+    root.mainloop()
+    root.destroy()
+    return lat
+
+
+def run_wake(n, burst):
+    root = tk.Tk(); root.withdraw()
+    q, lat, done = EventQueue(), [], threading.Event()
+    #the producer only sends whole bursts, and the last wakeup can land before it sets done
+    total = n // burst * burst
+
+    def process_queue(e=None):
+        q.pending = False
+        while True:
+            try:
+                task = q.get_nowait()
+            except queue.Empty:
+                break
+            lat.append(time.perf_counter() - task['queued'])
+        if len(lat) >= total:
+            root.quit()
+
+    root.bind('<<NudgeWake>>', process_queue)
+    q.notify = lambda: root.event_generate('<<NudgeWake>>', when='tail')
+    threading.Thread(target=producer, args=(q, n, burst, done), daemon=True).start()
+    root.mainloop()
+    root.destroy()
+    return lat
+
+
+def report(name, lat):
+    lat = sorted(x * 1000 for x in lat)
+    p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+    print(f"{name:>5}: n={len(lat)} mean={statistics.mean(lat):.2f}ms p50={statistics.median(lat):.2f}ms p99={p99:.2f}ms max={lat[-1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    burst = max(1, min(n, int(sys.argv[2]) if len(sys.argv) > 2 else 1))
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        sys.exit(f"wakeup_latency needs a display: {e}")
+    report("poll", run_poll(n, burst))
+    report("wake", run_wake(n, burst))
@@ -0,0 +1,211 @@
+# optional out-of-process input capture: the low-level hooks live in a small child process, so a
+# GIL stall in the GUI process can never make Windows time out and drop them
+import sys
+import time
+import struct
+import random
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+CAPTURE_RING = 8192
+CAPTURE_POLL = 0.004
+
+MOVE, CLICK, KEY, ROLL = 1, 2, 3, 4
+KEY_CLASSES = ('char', 'modifier', 'media', 'function', 'other')
+#a roll is sent as a fraction of this so it fits the record's int32 x field
+ROLL_SCALE = 1 << 31
+
+#t, kind, x, y plus padding to 24 bytes
+RECORD = struct.Struct('<dIii4x')
+#write index, roll threshold, stop flag, rolling flag
+HEADER = struct.Struct('<QdII')
+HEADER_SIZE = 64
+
+
+def valid(kind, x):
+    # a record is only trusted if it could have been written by run()
+    if kind == KEY:
+        return 0 <= x < len(KEY_CLASSES)
+    if kind == ROLL:
+        return 0 <= x < ROLL_SCALE
+    return kind in (MOVE, CLICK)
+
+
+def key_class(key):
+    name = getattr(key, 'name', None)
+    if name is None:
+        return 'char'
+    if name.split('_')[0] in ('shift', 'ctrl', 'alt', 'cmd'):
+        return 'modifier'
+    if name.startswith(('media_', 'volume_')):
+        return 'media'
+    if name[0] == 'f' and name[1:].isdigit():
+        return 'function'
+    return 'other'
+
+
+class Ring:
+    # single-consumer ring of fixed-size records; writers in the producing process (the mouse and
+    # keyboard hook threads) serialize on a lock and only ever bump the write index after the
+    # record is in place, and a lapped reader skips what it lost
+    def __init__(self, name=None, capacity=CAPTURE_RING, create=False):
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=HEADER_SIZE + capacity * RECORD.size)
+        if not create and sys.platform != "win32":
+            # attaching must not make this process's resource tracker unlink the parent's block
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass
+        self.buf = self.shm.buf
+        self.name = self.shm.name
+        self.r = 0
+        self.dropped = 0
+        self.wlock = threading.Lock()
+        if create:
+            HEADER.pack_into(self.buf, 0, 0, 0.0, 0, 0)
+
+    def header(self):
+        return HEADER.unpack_from(self.buf, 0)
+
+    def set(self, threshold=None, stop=None, rolling=None):
+        # field by field, never touching the write index the producer owns
+        if threshold is not None:
+            struct.pack_into('<d', self.buf, 8, threshold)
+        if stop is not None:
+            struct.pack_into('<I', self.buf, 16, int(stop))
+        if rolling is not None:
+            struct.pack_into('<I', self.buf, 20, int(rolling))
+
+    def write(self, kind, x, y, t=None):
+        t = time.perf_counter() if t is None else t
+        with self.wlock:
+            w = struct.unpack_from('<Q', self.buf, 0)[0]
+            RECORD.pack_into(self.buf, HEADER_SIZE + (w % self.capacity) * RECORD.size, t, kind, x, y)
+            struct.pack_into('<Q', self.buf, 0, w + 1)
+
+    def read(self):
+        w = struct.unpack_from('<Q', self.buf, 0)[0]
+        start = max(self.r, w - self.capacity)
+        self.dropped += start - self.r
+        out = [RECORD.unpack_from(self.buf, HEADER_SIZE + (i % self.capacity) * RECORD.size) for i in range(start, w)]
+        # anything the producer lapped while we were copying may be torn, including the record
+        # sharing a slot with the one it is writing now (index w2 - capacity, before w2 is bumped)
+        lost = struct.unpack_from('<Q', self.buf, 0)[0] - self.capacity - start + 1
+        if lost > 0:
+            self.dropped += lost
+            out = out[lost:]
+        self.r = w
+        return out
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def run(name, capacity):
+    # child process entry point: hooks write records, and a roll is only sent when it could
+    # start an event, so the GUI side can finish the draw against its live state
+    from pynput import mouse, keyboard
+    ring = Ring(name, capacity)
+
+    def roll(from_key):
+        _, threshold, _, rolling = ring.header()
+        if rolling:
+            u = random.random()
+            if u < threshold:
+                ring.write(ROLL, int(u * ROLL_SCALE), from_key)
+
+    def on_move(x, y):
+        ring.write(MOVE, x, y)
+        roll(0)
+
+    def on_click(x, y, button, pressed):
+        ring.write(CLICK, x, y)
+        roll(0)
+
+    def on_press(key):
+        ring.write(KEY, KEY_CLASSES.index(key_class(key)), 0)
+        roll(1)
+        return True
+
+    ml = mouse.Listener(on_move=on_move, on_click=on_click)
+    kl = keyboard.Listener(on_press=on_press, suppress=False)
+    ml.start()
+    kl.start()
+    try:
+        while not ring.header()[2]:
+            time.sleep(0.1)
+    finally:
+        ml.stop()
+        kl.stop()
+        ring.close()
+
+
+class Capture:
+    # stands in for the pynput listener pair: start/stop/join/is_alive, with batches from the
+    # child handed to on_batch on a reader thread in this process
+    def __init__(self, on_batch, threshold, rolling=True, capacity=CAPTURE_RING, poll=CAPTURE_POLL):
+        self.on_batch = on_batch
+        self.threshold = threshold
+        self.rolling = rolling
+        self.capacity = capacity
+        self.poll = poll
+        self.ring = None
+        self.proc = None
+        self.thread = None
+        self.stopped = threading.Event()
+        self.batches = 0
+        self.records = 0
+        self.errors = 0
+
+    def start(self):
+        self.ring = Ring(capacity=self.capacity, create=True)
+        self.ring.set(threshold=self.threshold, rolling=self.rolling)
+        self.proc = multiprocessing.Process(target=run, args=(self.ring.name, self.capacity), daemon=True)
+        self.proc.start()
+        self.thread = threading.Thread(target=self.reader, daemon=True)
+        self.thread.start()
+
+    def set_threshold(self, threshold):
+        self.threshold = threshold
+        if self.ring:
+            self.ring.set(threshold=threshold)
+
+    def reader(self):
+        while not self.stopped.wait(self.poll):
+            batch = self.ring.read()
+            if batch:
+                self.batches += 1
+                self.records += len(batch)
+                try:
+                    self.on_batch(batch)
+                except Exception:
+                    self.errors += 1
+
+    def is_alive(self):
+        return self.proc is not None and self.proc.is_alive()
+
+    def stop(self):
+        self.stopped.set()
+        if self.ring:
+            self.ring.set(stop=True)
+
+    def join(self, timeout=2.0):
+        if self.thread:
+            self.thread.join(timeout)
+        if self.proc:
+            self.proc.join(timeout)
+            if self.proc.is_alive():
+                self.proc.terminate()
+        if self.ring:
+            self.ring.close(unlink=True)
+            self.ring = None
+
+    def stats(self):
+        return {'batches': self.batches, 'records': self.records, 'errors': self.errors,
+                'dropped': self.ring.dropped if self.ring else 0}
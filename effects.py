@@ -0,0 +1,142 @@
+import time
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+EFFECT_WORKERS = 2
+EFFECT_MAX_PENDING = 8
+EFFECT_SHUTDOWN = 3.0
+
+
+class Change:
+    __slots__ = ('id', 'name', 'undo', 'state', 'due', 'applied', 'reverted')
+
+    def __init__(self, id, name, undo):
+        self.id = id
+        self.name = name
+        self.undo = undo
+        self.state = None
+        self.due = None
+        self.applied = None
+        self.reverted = Future()
+
+
+class EffectPool:
+    # blocking side effects (display modes, system time, launching things) run on a small pool
+    # instead of the Tk thread; anything that has to be put back is journalled and reverted when
+    # its hold runs out, when asked, or at shutdown, whichever comes first
+    def __init__(self, workers=EFFECT_WORKERS, max_pending=EFFECT_MAX_PENDING):
+        self.ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="effect")
+        self.max_pending = max_pending
+        self.inflight = set()
+        self.journal = {}
+        self.ids = itertools.count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.counts = {'submitted': 0, 'rejected': 0, 'reverted': 0, 'failed': 0}
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def submit(self, fn, *args):
+        with self.cond:
+            if self.closed or len(self.inflight) >= self.max_pending:
+                self.counts['rejected'] += 1
+                f = Future()
+                f.set_exception(RuntimeError("effect pool is closed" if self.closed else "effect pool is full"))
+                return f
+            self.counts['submitted'] += 1
+            f = self.ex.submit(fn, *args)
+            self.inflight.add(f)
+        f.add_done_callback(self.settled)
+        return f
+
+    def settled(self, f):
+        with self.cond:
+            self.inflight.discard(f)
+        if f.exception() is not None:
+            self.counts['failed'] += 1
+
+    def apply(self, name, do, undo, hold):
+        # do() returns whatever undo() needs to restore the old state, or None if nothing changed
+        c = Change(next(self.ids), name, undo)
+        c.applied = self.submit(self.run_do, c, do, hold)
+        c.applied.add_done_callback(lambda f: self.failed(c, f))
+        return c
+
+    def failed(self, c, f):
+        if f.exception() is not None:
+            self.resolve(c, None)
+
+    def run_do(self, c, do, hold):
+        state = do()
+        if state is None:
+            self.resolve(c, None)
+            return None
+        c.state = state
+        with self.cond:
+            closed = self.closed
+            if not closed:
+                c.due = time.monotonic() + hold
+                self.journal[c.id] = c
+                self.cond.notify()
+        if closed:
+            self.run_undo(c)
+        return state
+
+    def revert(self, c):
+        with self.cond:
+            if self.journal.pop(c.id, None) is None:
+                return c.reverted
+        # reverts skip the pending bound, they must never be turned away
+        self.ex.submit(self.run_undo, c)
+        return c.reverted
+
+    def run_undo(self, c):
+        try:
+            c.undo(c.state)
+        except Exception as e:
+            self.counts['failed'] += 1
+            if not c.reverted.done():
+                c.reverted.set_exception(e)
+            return
+        self.counts['reverted'] += 1
+        self.resolve(c, c.state)
+
+    def resolve(self, c, value):
+        if not c.reverted.done():
+            c.reverted.set_result(value)
+
+    def watch(self):
+        while True:
+            with self.cond:
+                while not self.closed:
+                    now = time.monotonic()
+                    due = [c for c in self.journal.values() if c.due <= now]
+                    if due:
+                        break
+                    nxt = min((c.due for c in self.journal.values()), default=None)
+                    self.cond.wait(None if nxt is None else nxt - now)
+                if self.closed:
+                    return
+            for c in due:
+                self.revert(c)
+
+    def shutdown(self, timeout=EFFECT_SHUTDOWN):
+        # let running effects land so they are journalled, then undo everything on this thread,
+        # since the pool itself may be stuck behind a slow driver
+        with self.cond:
+            self.closed = True
+            inflight = list(self.inflight)
+            self.cond.notify()
+        wait(inflight, timeout)
+        with self.cond:
+            changes = sorted(self.journal.values(), key=lambda c: c.id, reverse=True)
+            self.journal.clear()
+        for c in changes:
+            self.run_undo(c)
+        self.ex.shutdown(wait=False)
+
+    def stats(self):
+        with self.cond:
+            now = time.monotonic()
+            journal = [f"{c.name} in {c.due - now:.1f}s" for c in self.journal.values()]
+            return dict(self.counts, inflight=len(self.inflight), journal=journal)
@@ -0,0 +1,88 @@
+import threading
+from collections import deque
+
+import bake
+
+#frames decoded ahead of playback; animations this short are kept whole after the first pass
+ANIM_RING = 4
+ANIM_MIN_MS = 20
+ANIM_DEFAULT_MS = 100
+
+
+def frame_ms(info):
+    # browsers treat tiny GIF delays as "as fast as possible" and clamp them, so do the same
+    d = info.get('duration') or ANIM_DEFAULT_MS
+    return max(ANIM_MIN_MS, d)
+
+
+class FrameStream:
+    # decodes and scales frames on a background thread into a bounded ring; frame 0 comes out as
+    # (0, None, duration) on the first pass, because the caller already shows the cached still
+    def __init__(self, path, size, fit='cover', capacity=ANIM_RING, angle=0):
+        self.path = path
+        self.size = size
+        self.fit = fit
+        self.angle = angle
+        self.capacity = capacity
+        self.ring = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.decoded = 0
+        self.error = None
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def put(self, item):
+        with self.cond:
+            while len(self.ring) >= self.capacity and not self.closed:
+                self.cond.wait()
+            if self.closed:
+                return False
+            self.ring.append(item)
+            return True
+
+    def next(self):
+        with self.cond:
+            if not self.ring:
+                return None
+            item = self.ring.popleft()
+            self.cond.notify()
+            return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.ring.clear()
+            self.cond.notify_all()
+
+    def run(self):
+        from PIL import Image
+        try:
+            with Image.open(self.path) as img:
+                n = getattr(img, 'n_frames', 1)
+                kept = [None] * n if n <= self.capacity else None
+                first = True
+                while not self.closed:
+                    for i in range(n):
+                        if kept and kept[i] is not None:
+                            item = kept[i]
+                        else:
+                            img.seek(i)
+                            ms = frame_ms(img.info)
+                            if first and i == 0:
+                                item = (0, None, ms / 1000)
+                            else:
+                                frame = img.convert('RGBA')
+                                frame = frame.resize(bake.target_size(frame.size, self.size, self.fit), Image.Resampling.LANCZOS)
+                                if self.angle:
+                                    frame = frame.rotate(-self.angle, Image.Resampling.BICUBIC, expand=True)
+                                item = (i, frame, ms / 1000)
+                                self.decoded += 1
+                                if kept is not None:
+                                    kept[i] = item
+                        if not self.put(item):
+                            return
+                    first = False
+                    if n == 1:
+                        return
+        except Exception as e:
+            self.error = e
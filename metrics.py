@@ -0,0 +1,135 @@
+import json
+import time
+import threading
+from collections import defaultdict, deque
+
+#stage pairs measured for every event span: (name, from, to)
+INTERVALS = (
+    ('queue_wait', 'queued', 'dispatched'),
+    ('handler', 'dispatched', 'handled'),
+    ('first_frame', 'handled', 'first_frame'),
+    ('trigger_to_frame', 'rolled', 'first_frame'),
+    ('slot_hold', 'claimed', 'finished'),
+)
+QUANTILES = (0.5, 0.9, 0.99)
+#seconds between background writes of the span log and the Prometheus snapshot
+FLUSH_INTERVAL = 2.0
+
+
+class Span:
+    __slots__ = ('event', 'marks')
+
+    def __init__(self, event, t=None):
+        self.event = event
+        self.marks = {'rolled': t if t is not None else time.perf_counter()}
+
+    def mark(self, stage, t=None):
+        self.marks.setdefault(stage, t if t is not None else time.perf_counter())
+
+    def intervals(self):
+        m = self.marks
+        return {name: m[b] - m[a] for name, a, b in INTERVALS if a in m and b in m}
+
+
+class Tracer:
+    # rolling per-event, per-stage windows plus a JSON-lines log and a Prometheus text snapshot;
+    # the files are written by a background thread, so finish() never touches the disk
+    def __init__(self, jsonl=None, prom=None, window=512, flush=FLUSH_INTERVAL):
+        self.jsonl = jsonl
+        self.prom = prom
+        self.window = window
+        self.flush = flush
+        self.lock = threading.Lock()
+        self.hists = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+        self.sums = defaultdict(float)
+        self.pending = []
+        self.dirty = False
+        self.wake = threading.Event()
+        self.closed = False
+        self.writer = None
+
+    def start(self, event, t=None):
+        return Span(event, t)
+
+    def finish(self, span):
+        if span is None:
+            return
+        span.mark('finished')
+        iv = span.intervals()
+        with self.lock:
+            for name, d in iv.items():
+                key = (span.event, name)
+                self.hists[key].append(d)
+                self.counts[key] += 1
+                self.sums[key] += d
+            if self.jsonl:
+                self.pending.append({'event': span.event, 'marks': dict(span.marks), 'intervals': iv})
+            self.dirty = True
+            if (self.jsonl or self.prom) and self.writer is None and not self.closed:
+                self.writer = threading.Thread(target=self.write_loop, daemon=True)
+                self.writer.start()
+
+    def write_loop(self):
+        # at most one append and one snapshot per flush interval, however many events finish
+        while not self.wake.wait(self.flush):
+            self.write()
+        self.write()
+
+    def write(self):
+        with self.lock:
+            recs, self.pending = self.pending, []
+            dirty, self.dirty = self.dirty, False
+        if recs and self.jsonl:
+            try:
+                with open(self.jsonl, 'a') as f:
+                    f.write("".join(json.dumps(rec) + "\n" for rec in recs))
+            except OSError:
+                pass
+        if dirty and self.prom:
+            self.export(self.prom)
+
+    def close(self, timeout=2.0):
+        with self.lock:
+            self.closed = True
+            writer = self.writer
+        self.wake.set()
+        if writer:
+            writer.join(timeout)
+
+    def quantiles(self, key):
+        xs = sorted(self.hists[key])
+        return {q: xs[min(len(xs) - 1, int(len(xs) * q))] for q in QUANTILES} if xs else {}
+
+    def prometheus(self):
+        lines = [
+            "# HELP nudge_stage_seconds Trigger path stage durations over a rolling window.",
+            "# TYPE nudge_stage_seconds summary",
+        ]
+        with self.lock:
+            for key in sorted(self.hists):
+                event, stage = key
+                labels = f'event="{event}",stage="{stage}"'
+                for q, v in self.quantiles(key).items():
+                    lines.append(f'nudge_stage_seconds{{{labels},quantile="{q}"}} {v:.6f}')
+                lines.append(f'nudge_stage_seconds_sum{{{labels}}} {self.sums[key]:.6f}')
+                lines.append(f'nudge_stage_seconds_count{{{labels}}} {self.counts[key]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        try:
+            with open(path, 'w') as f:
+                f.write(self.prometheus())
+        except OSError:
+            pass
+
+    def summary(self):
+        lines = []
+        with self.lock:
+            for key in sorted(self.hists):
+                event, stage = key
+                q = self.quantiles(key)
+                if q:
+                    lines.append(f"{event:<18} {stage:<16} n={self.counts[key]:<5} "
+                                 + " ".join(f"p{int(k * 100)}={v * 1000:.1f}ms" for k, v in q.items()))
+        return "\n".join(lines) or "No events traced yet."
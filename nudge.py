@@ -1,28 +1,39 @@
+import time
+_T0 = time.perf_counter()
+
 import tkinter as tk
-from PIL import Image, ImageTk, ImageDraw
 import random
-import time
 import threading
 import sys
-import os
-import wave
-import struct
 import queue
 import math
 import webbrowser
 import subprocess
-
-try:
-    from pynput import mouse, keyboard
-    import win32api
-    import win32con
-    import win32gui
-    import pywintypes
-    import pystray
-except ImportError:
-    sys.exit(1)
+import bisect
+import itertools
+import multiprocessing
+import contextlib
+import datetime
+from collections import OrderedDict, deque, namedtuple
+
+import metrics
+import assets
+import bake
+import timers
+import windows
+import effects
+import frames
+import capture
+import profiler
+
+#heavy modules are imported by load_modules() once the control panel is up
+Image = ImageTk = ImageDraw = None
+audio = None
+mouse = keyboard = None
+win32api = win32con = win32gui = win32process = pywintypes = pystray = None
 
 FPS = 60
+MAX_FRAME_STEPS = 5 #fixed steps simulated per tick before the animation is allowed to fall behind
 BLACK = "#000000"
 RED = "#C80000"
 WHITE = "#FFFFFF"
@@ -32,7 +43,20 @@ MOVE_TEXT = "DON'T MOVE"
 IMAGE_DIR = "images"
 SOUND_DIR = "sounds"
 ENTITY_DIR = "entities"
-FALLBACK_FILE = "t_s.wav"
+ENTITY_SIZE = (100, 200)
+#entity variants prepared once per asset: scales of ENTITY_SIZE, and headings quantized to N orientations (1 keeps them upright)
+ENTITY_SCALES = (0.75, 1.0, 1.25)
+ENTITY_ORIENTATIONS = 8
+#asset metadata cache and how often the asset folders are checked for changes while armed (seconds)
+MANIFEST_FILE = "assets_manifest.json"
+ASSET_POLL = 2.0
+#procedural sounds used when there is no sounds folder
+FALLBACK_SOUNDS = ('static', 'scream', 'stinger')
+#None picks winsound on windows, otherwise "null" or "wav:<path>"
+AUDIO_BACKEND = None
+
+#window list for Window Swap: "hook" (WinEvent hooks), "poll" (throttled re-enumeration) or "fake"; None picks by platform
+WINDOW_BACKEND = None
 
 #chances of events happening (the lower the number, the more likely and vice versa)
 TYPING_CHANCE_KEY = 100
@@ -47,159 +71,1183 @@ FLIP_CHANCE = 1000
 TIME_CHANCE = 1100
 BROWSER_CHANCE = 1200
 
-def create_temp_wav(f):
-    if os.path.exists(f): return
-    duration, freq, bits, n_chan = 200, 44100, 16, 1
-    s_width = bits // 8
-    max_amp = 2**(bits - 1) - 1
-    total_samples = int(freq * (duration / 1000.0))
-    frames = bytearray()
-    for _ in range(total_samples):
-        sample = random.randint(-max_amp, max_amp)
-        frames += struct.pack('<h', sample)
+#"input" rolls for an event on every input callback, "hazard" rolls on a fixed tick while the user is active
+TRIGGER_MODE = "input"
+HAZARD_RATE = 1 / 30 #expected events per second of user activity
+HAZARD_TICK = 0.25
+
+#roll order of the events and the state each roll depends on (None = always rolled)
+HORROR_CHANCES = [
+    ('typing_possession', TYPING_CHANCE_KEY, 'key'),
+    ('typing_possession', TYPING_CHANCE_GENERAL, 'typing'),
+    ('browser_hijack', BROWSER_CHANCE, None),
+    ('time_warp', TIME_CHANCE, None),
+    ('screen_flip', FLIP_CHANCE, None),
+    ('window_swap', SWAP_CHANCE, None),
+    ('rps_game', RPS_CHANCE, 'no_popup'),
+    ('popup_hell', POPUP_CHANCE, 'no_popup'),
+    ('dont_move', MOVE_CHANCE, None),
+    ('jumpscare', JUMPSCARE_CHANCE, None),
+    ('entity', ENTITY_CHANCE, None),
+]
+
+#resources each event holds while it runs; events whose slots don't overlap run side by side.
+#"focus" is the user's keyboard and mouse: Don't Move must never overlap injected typing or a window to click
+EVENT_SLOTS = {
+    'jumpscare': ('overlay',),
+    'dont_move': ('overlay', 'focus'),
+    'entity': ('overlay',),
+    'window_swap': ('overlay', 'focus'),
+    'popup_hell': ('popup',),
+    'rps_game': ('popup', 'focus'),
+    'screen_flip': ('system',),
+    'time_warp': ('system',),
+    'browser_hijack': ('focus',),
+    'typing_possession': ('focus',),
+}
+
+#trigger path spans (JSON lines) and rolling stage summaries (Prometheus text)
+METRICS_JSONL = "nudge_metrics.jsonl"
+METRICS_PROM = "nudge_metrics.prom"
+#tray profiler output: <prefix>_<start time>.txt (per-handler report) and .folded (flame graph stacks)
+PROFILE_PREFIX = "nudge_profile"
+
+#Don't Move sensitivity: pointer travel below MOVE_MIN_PX is forgiven, as are keys in the
+#listed classes ("modifier", "function", "media", "other"; plain characters are "char")
+MOVE_MIN_PX = 0
+MOVE_IGNORED_KEYS = ()
+
+#where the input hooks run: "thread" (pynput listeners in this process) or "process" (a small capture
+#process that streams records through shared memory, isolated from GIL stalls in rendering)
+INPUT_CAPTURE = "thread"
+
+#typing possession: keys per second (with +/- jitter), and how long to wait for Notepad to hold focus
+TYPE_RATE = 12
+TYPE_JITTER = 0.4
+TYPE_WAIT = 5.0
+TYPE_POLL = 0.05
+
+#which displays full-screen events cover: "all", "cursor" (the display under the mouse) or "primary"
+OVERLAY_TARGET = "all"
+
+#full-screen overlays kept withdrawn and reused instead of being rebuilt per event
+OVERLAY_POOL = 2
+
+#popup hell grows by POPUP_STEP windows per failed wave, up to POPUP_MAX
+POPUP_STEP = 5
+POPUP_MAX = 300
+POPUP_FRAME_MS = 8 #time spent creating or destroying popups per frame
+
+#memory budget for pre-scaled jumpscare images (bytes)
+IMAGE_CACHE_BYTES = 256 * 1024 * 1024
+
+class StartupProfile:
+    # wall-clock phases since nudge.py started importing, in the spirit of -X importtime
+    def __init__(self, t0):
+        self.t0 = t0
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, t, time.perf_counter() - t)
+
+    def mark(self, name):
+        self.add(name, time.perf_counter(), 0.0)
+
+    def add(self, name, t, dur):
+        with self.lock:
+            self.phases.append((t - self.t0, dur, threading.current_thread().name, name))
+
+    def report(self):
+        with self.lock:
+            rows = sorted(self.phases)
+        lines = [f"{'start ms':>9} {'took ms':>9}  {'thread':<12} phase"]
+        lines += [f"{t * 1000:9.1f} {d * 1000:9.1f}  {th[:12]:<12} {name}" for t, d, th, name in rows]
+        return "\n".join(lines)
+
+
+STARTUP = StartupProfile(_T0)
+_modules_lock = threading.Lock()
+
+
+def load_modules():
+    global Image, ImageTk, ImageDraw, audio, mouse, keyboard
+    global win32api, win32con, win32gui, win32process, pywintypes, pystray
+    with _modules_lock:
+        if Image is not None:
+            return
+        with STARTUP.phase("import PIL"):
+            from PIL import ImageTk, ImageDraw
+            from PIL import Image
+        with STARTUP.phase("import audio (numpy)"):
+            import audio
+        #windows-only modules; the app refuses to start without them, but Manager stays usable for benchmarks
+        with STARTUP.phase("import pynput"):
+            try:
+                from pynput import mouse, keyboard
+            except ImportError:
+                pass
+        with STARTUP.phase("import pywin32"):
+            try:
+                import win32api, win32con, win32gui, win32process, pywintypes
+            except ImportError:
+                pass
+        with STARTUP.phase("import pystray"):
+            try:
+                import pystray
+            except ImportError:
+                pass
+
+
+Monitor = namedtuple('Monitor', 'x y w h device')
+
+
+def enum_monitors():
+    mons = []
     try:
-        with wave.open(f, 'wb') as wf:
-            wf.setnchannels(n_chan)
-            wf.setsampwidth(s_width)
-            wf.setframerate(freq)
-            wf.writeframes(frames)
+        for h_mon, _, _ in win32api.EnumDisplayMonitors():
+            info = win32api.GetMonitorInfo(h_mon)
+            l, t, r, b = info['Monitor']
+            mons.append(Monitor(l, t, r - l, b - t, info.get('Device')))
     except Exception:
-        pass
+        return []
+    return sorted(mons, key=lambda m: (m.x != 0 or m.y != 0, m.x, m.y))
 
 
-class Manager:
-    def __init__(self, q):
+def bake_jobs(i_paths, e_paths, screens):
+    return [(p, s, 'cover') for p in i_paths for s in screens] + [(p, ENTITY_SIZE, 'fit') for p in e_paths]
+
+
+class ImageCache:
+    # decoded images already scaled to cover a screen, keyed by (path, screen size)
+    def __init__(self, budget=IMAGE_CACHE_BYTES):
+        self.budget = budget
         self.lock = threading.Lock()
-        self.active = None
+        self.entries = OrderedDict()
+        self.used = 0
+        self.dead = []
+        self.hits = 0
+        self.misses = 0
+        self.frame_times = deque(maxlen=64)
+        self.baked = None
+
+    def load(self, p, screen):
+        return self.load_many(p, [screen])[screen]
+
+    def load_many(self, p, screens):
+        # the source is decoded at most once however many resolutions it is scaled to
+        out, src = {}, None
+        for screen in screens:
+            img = self.baked.get(p, screen) if self.baked else None
+            if img is None:
+                if src is None:
+                    src = Image.open(p)
+                    if src.mode not in ('RGB', 'RGBA'):
+                        src = src.convert('RGBA')
+                img = src.resize(bake.cover_size(src.size, screen), Image.Resampling.LANCZOS)
+            out[screen] = img
+        return out
+
+    def preload(self, p, screens):
+        with self.lock:
+            missing = [s for s in dict.fromkeys(screens) if (p, s) not in self.entries]
+        if missing:
+            for screen, img in self.load_many(p, missing).items():
+                self.put((p, screen), img)
+
+    def put(self, key, img):
+        e = [img, None, img.width * img.height * len(img.getbands())]
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.drop(old)
+            self.entries[key] = e
+            self.used += e[2]
+            self.trim()
+        return e
+
+    def drop(self, e):
+        self.used -= e[2]
+        if e[1] is not None:
+            #PhotoImages may only be freed on the Tk thread
+            self.dead.append(e[1])
+
+    def trim(self):
+        while self.used > self.budget and len(self.entries) > 1:
+            _, e = self.entries.popitem(last=False)
+            self.drop(e)
+
+    def photo(self, p, screen):
+        key = (p, screen)
+        with self.lock:
+            self.dead.clear()
+            e = self.entries.get(key)
+            if e:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if e is None:
+            self.misses += 1
+            e = self.put(key, self.load(p, screen))
+        if e[1] is None:
+            e[1] = ImageTk.PhotoImage(e[0])
+            with self.lock:
+                #the asset watcher may have evicted it meanwhile; its bytes were already given back
+                if self.entries.get(key) is e:
+                    e[2] += e[0].width * e[0].height * 4
+                    self.used += e[0].width * e[0].height * 4
+                    self.trim()
+        return e[1]
+
+    def warm(self, paths, screens):
+        for p in list(paths):
+            with self.lock:
+                if self.used >= self.budget:
+                    return
+            try:
+                self.preload(p, screens)
+            except Exception:
+                pass
+
+    def record_frame(self, t0):
+        self.frame_times.append(time.perf_counter() - t0)
+
+    def stats(self):
+        with self.lock:
+            ft = list(self.frame_times)
+            return {
+                'entries': len(self.entries),
+                'bytes': self.used,
+                'budget': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'last_frame_ms': ft[-1] * 1000 if ft else None,
+                'avg_frame_ms': sum(ft) / len(ft) * 1000 if ft else None,
+            }
+
+
+class EntityAtlas:
+    # each entity asset scaled and rotated into every variant once, off the Tk thread; a spawn
+    # only looks one up, and its PhotoImage is made on first use and then shared
+    def __init__(self, scales=ENTITY_SCALES, orientations=ENTITY_ORIENTATIONS):
+        self.scales = scales
+        self.orientations = max(1, orientations)
+        self.variants = {}
+        self.photos = {}
+        self.lock = threading.Lock()
+        self.baked = None
+
+    def build(self, p):
+        base = self.baked.get(p, ENTITY_SIZE, 'fit') if self.baked else None
+        if base is None:
+            with Image.open(p) as img:
+                base = img.convert('RGBA').resize(ENTITY_SIZE, Image.Resampling.LANCZOS)
+        out = {}
+        for si in range(len(self.scales)):
+            size = self.size(si)
+            img = base if size == base.size else base.resize(size, Image.Resampling.LANCZOS)
+            for oi in range(self.orientations):
+                out[si, oi] = img.rotate(-self.angle(oi), Image.Resampling.BICUBIC, expand=True) if oi else img
+        with self.lock:
+            self.variants[p] = out
+        return out
+
+    def build_all(self, paths):
+        for p in list(paths):
+            if p not in self.variants:
+                try:
+                    self.build(p)
+                except Exception:
+                    pass
+
+    def drop(self, p):
+        with self.lock:
+            self.variants.pop(p, None)
+
+    def size(self, si):
+        return round(ENTITY_SIZE[0] * self.scales[si]), round(ENTITY_SIZE[1] * self.scales[si])
+
+    def angle(self, oi):
+        return oi * 360 / self.orientations
+
+    def orientation(self, vx, vy):
+        # the image's top points along the heading; screen y grows downwards
+        if self.orientations == 1:
+            return 0
+        a = (math.degrees(math.atan2(vy, vx)) + 90) % 360
+        return round(a / (360 / self.orientations)) % self.orientations
+
+    def photo(self, p, si, oi):
+        # Tk thread only
+        v = self.variants.get(p)
+        if v is None:
+            v = self.build(p)
+        key = (p, si, oi)
+        ph = self.photos.get(key)
+        if ph is None:
+            ph = self.photos[key] = ImageTk.PhotoImage(v[si, oi])
+        return ph
+
+    def prune(self):
+        # Tk thread only: forget the PhotoImages of assets that were dropped
+        for key in [k for k in self.photos if k[0] not in self.variants]:
+            del self.photos[key]
+
+    def stats(self):
+        return {'assets': len(self.variants), 'variants': sum(len(v) for v in self.variants.values()), 'photos': len(self.photos)}
+
+
+class EventSampler:
+    # collapses the roll cascade into one cumulative table per combination of tags,
+    # so picking "no event" or an event costs a single random draw
+    def __init__(self, chances=HORROR_CHANCES):
+        self.configure(chances)
+
+    def configure(self, chances):
+        self.chances = list(chances)
+        tags = sorted({t for _, _, t in self.chances if t})
+        tables = {}
+        for n in range(len(tags) + 1):
+            for combo in itertools.combinations(tags, n):
+                tables[frozenset(combo)] = self.build(set(combo))
+        self.tables = tables
+
+    def set_chance(self, event, chance, tag=None):
+        self.configure([(e, chance if e == event and t == tag else c, t) for e, c, t in self.chances])
+
+    def build(self, tags):
+        cum, names = [], []
+        acc, p_none = 0.0, 1.0
+        for event, chance, tag in self.chances:
+            if tag and tag not in tags:
+                continue
+            p = p_none / chance
+            p_none -= p
+            acc += p
+            cum.append(acc)
+            names.append(event)
+        return cum, names
+
+    def sample(self, tags=frozenset(), r=None):
+        cum, names = self.tables[tags]
+        i = bisect.bisect_right(cum, random.random() if r is None else r)
+        return names[i] if i < len(names) else None
+
+    def pick(self, tags=frozenset()):
+        # draw an event assuming one happens, keeping the relative odds of the table
+        cum, names = self.tables[tags]
+        if not cum:
+            return None
+        i = bisect.bisect_right(cum, random.random() * cum[-1])
+        return names[min(i, len(names) - 1)]
+
+    def max_chance(self):
+        # the most likely any roll is to start something, over every tag combination
+        return max((cum[-1] for cum, _ in self.tables.values() if cum), default=0.0)
+
+    def probabilities(self, tags=frozenset()):
+        cum, names = self.tables[frozenset(tags)]
+        probs = {None: 1.0 - (cum[-1] if cum else 0.0)}
+        prev = 0.0
+        for c, event in zip(cum, names):
+            probs[event] = probs.get(event, 0.0) + c - prev
+            prev = c
+        return probs
+
+
+class Animator:
+    # one fixed-timestep loop on the Tk thread shared by every moving sprite
+    def __init__(self, root, fps=FPS):
+        self.root = root
+        self.step = 1.0 / fps
+        self.sprites = []
+        self.job = None
+        self.last = 0.0
+        self.next = 0.0
+        self.acc = 0.0
+        self.frames = 0
+        self.dropped = 0
+        self.frame_ms = deque(maxlen=fps * 2)
+
+    def add(self, sprite):
+        self.sprites.append(sprite)
+        if self.job is None:
+            self.last = time.perf_counter()
+            self.next = self.last + self.step
+            self.acc = 0.0
+            self.job = self.root.after(int(self.step * 1000), self.tick)
+
+    def tick(self):
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        self.frames += 1
+        late = int(elapsed / self.step) - 1
+        if late > 0:
+            self.dropped += late
+        self.acc += min(elapsed, self.step * MAX_FRAME_STEPS)
+        steps = 0
+        while self.acc >= self.step:
+            self.acc -= self.step
+            steps += 1
+
+        sprites, self.sprites = self.sprites, []
+        for s in sprites:
+            alive = True
+            for _ in range(steps):
+                if s.update(self.step) is False:
+                    alive = False
+                    break
+            if alive:
+                s.draw()
+                self.sprites.append(s)
+        self.frame_ms.append((time.perf_counter() - now) * 1000)
+
+        if self.sprites:
+            self.next += self.step
+            if self.next < now:
+                self.next = now + self.step
+            self.job = self.root.after(max(1, int((self.next - time.perf_counter()) * 1000)), self.tick)
+        else:
+            self.job = None
+
+    def stats(self):
+        ft = list(self.frame_ms)
+        return {
+            'sprites': len(self.sprites),
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'avg_frame_ms': sum(ft) / len(ft) if ft else None,
+            'max_frame_ms': max(ft) if ft else None,
+        }
+
+
+class EntitySprite:
+    # moves in pixels per second and hit-tests against the cursor the listener already tracks
+    def __init__(self, c, item, x, y, vx, vy, w, h, bounds, pointer, on_hit, on_exit):
+        self.c = c
+        self.item = item
+        self.x, self.y = x, y
+        self.vx, self.vy = vx, vy
+        self.w, self.h = w, h
+        self.bounds = bounds
+        self.pointer = pointer
+        self.on_hit = on_hit
+        self.on_exit = on_exit
+        self.done = False
+        self.photo = None
+
+    def update(self, dt):
+        if self.done:
+            return False
+        if not self.c.winfo_exists():
+            self.done = True
+            self.on_exit(self)
+            return False
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        mx, my = self.pointer()
+        if self.x < mx < self.x + self.w and self.y < my < self.y + self.h:
+            self.done = True
+            self.on_hit(self)
+            return False
+        cx, cy = self.x + self.w / 2, self.y + self.h / 2
+        b_w, b_h = self.bounds
+        if cx < -self.w or cx > b_w + self.w or cy < -self.h or cy > b_h + self.h:
+            self.done = True
+            self.on_exit(self)
+            return False
+        return True
+
+    def draw(self):
+        self.c.moveto(self.item, round(self.x), round(self.y))
+
+
+class FramePlayer:
+    # steps an animation by its own frame durations from the animator's clock, dropping frames
+    # that fell due while Tk was busy; one stream can feed several canvas items (the same image
+    # on equal-sized displays), and it stops once all of them are gone
+    def __init__(self, c, item, stream):
+        self.targets = [(c, item)]
+        self.stream = stream
+        self.t = 0.0
+        self.due = None
+        self.pending = None
+        self.photo = None
+        self.shown = 0
+        self.dropped = 0
+
+    def attach(self, c, item):
+        self.targets.append((c, item))
+        if self.photo is not None:
+            c.itemconfig(item, image=self.photo)
+
+    def update(self, dt):
+        self.targets = [(c, item) for c, item in self.targets if c.winfo_exists() and c.type(item)]
+        if not self.targets:
+            self.stream.close()
+            return False
+        self.t += dt
+        while self.due is None or self.t >= self.due:
+            f = self.stream.next()
+            if f is None:
+                #decoder behind: hold the current frame and catch up by time once it delivers
+                break
+            _, img, dur = f
+            self.due = (self.due or 0.0) + dur
+            if self.pending is not None:
+                self.dropped += 1
+            if img is not None:
+                self.pending = img
+        return True
+
+    def draw(self):
+        if self.pending is None:
+            return
+        img, self.pending = self.pending, None
+        if self.photo is None or (self.photo.width(), self.photo.height()) != img.size:
+            self.photo = ImageTk.PhotoImage(img)
+            for c, item in self.targets:
+                c.itemconfig(item, image=self.photo)
+        else:
+            self.photo.paste(img)
+        self.shown += 1
+
+
+class OverlayPool:
+    # pre-built, withdrawn overlays per display that are reset and shown on demand
+    def __init__(self, root, size=OVERLAY_POOL):
+        self.root = root
+        self.size = size
+        self.free = {}
+        self.busy = set()
+        self.styles = {}
+
+    def build(self, mon):
+        o = tk.Toplevel(self.root)
+        o.withdraw()
+        o.geometry(f"{mon.w}x{mon.h}+{mon.x}+{mon.y}")
+        o.overrideredirect(True)
+        o.wm_attributes("-topmost", True)
+        o.wm_attributes("-transparentcolor", KEY)
+        o.config(bg=KEY)
+        c = tk.Canvas(o, width=mon.w, height=mon.h, bg=KEY, highlightthickness=0)
+        c.pack()
+        o.canvas = c
+        o.mon = mon
+        self.styles[o] = win32gui.GetWindowLong(o.winfo_id(), win32con.GWL_EXSTYLE)
+        return o
+
+    def fill(self, monitors):
+        for mon in monitors:
+            free = self.free.setdefault(mon, [])
+            while len(free) + sum(1 for o in self.busy if o.mon == mon) < self.size:
+                free.append(self.build(mon))
+
+    def acquire(self, mon):
+        o = None
+        free = self.free.setdefault(mon, [])
+        while free and o is None:
+            o = free.pop()
+            if not o.winfo_exists():
+                self.styles.pop(o, None)
+                o = None
+        if o is None:
+            o = self.build(mon)
+        c = o.canvas
+        c.delete("all")
+        c.config(bg=KEY)
+        o.deiconify()
+        o.lift()
+        o.wm_attributes("-topmost", True)
+        self.busy.add(o)
+        return o, c
+
+    def in_use(self, o):
+        return o in self.busy and o.winfo_exists()
+
+    def set_click_through(self, o, on):
+        style = self.styles[o]
+        win32gui.SetWindowLong(o.winfo_id(), win32con.GWL_EXSTYLE, style | win32con.WS_EX_TRANSPARENT if on else style)
+
+    def release(self, o):
+        if o not in self.busy:
+            return
+        self.busy.discard(o)
+        if not o.winfo_exists():
+            self.styles.pop(o, None)
+            return
+        win32gui.SetWindowLong(o.winfo_id(), win32con.GWL_EXSTYLE, self.styles[o])
+        o.canvas.delete("all")
+        o.withdraw()
+        free = self.free.setdefault(o.mon, [])
+        if len(free) < self.size:
+            free.append(o)
+        else:
+            self.styles.pop(o, None)
+            o.destroy()
+
+    def release_all(self, group):
+        for o, _, _ in group:
+            self.release(o)
+
+
+class PopupHell:
+    # one wave of popups sharing a single countdown variable, built and torn down a frame budget at a time
+    def __init__(self, gui):
+        self.gui = gui
+        self.root = gui.root
+        self.popups = {}
+        self.var = None
+        self.to_build = 0
+        self.build_id = None
+        self.timer = None
+        self.left = 0
+        self.dying = []
+        self.reap_id = None
+
+    def start(self):
+        m = self.gui.m
+        self.left = m.popup_limit
+        self.var = tk.StringVar(self.root, value=f"{self.left}")
+        self.to_build = m.popup_count
+        self.build()
+        self.timer = self.gui.every(1.0, self.tick, name="popup hell countdown")
+
+    def build(self):
+        self.build_id = None
+        end = time.perf_counter() + POPUP_FRAME_MS / 1000
+        while self.to_build > 0:
+            p = tk.Toplevel(self.root)
+            p.geometry(self.gui.random_spot(200, 100, random.choice(self.gui.targets())))
+            p.wm_attributes("-topmost", True)
+            p.title("Close It")
+            p.protocol("WM_DELETE_WINDOW", lambda p=p: self.close(p))
+            l = tk.Label(p, textvariable=self.var, font=("Arial", 16), fg='red')
+            l.pack(pady=5)
+            tk.Button(p, text="Close", command=lambda p=p: self.close(p)).pack(pady=5)
+            self.popups[p] = l
+            self.to_build -= 1
+            if time.perf_counter() >= end:
+                break
+        if self.to_build > 0:
+            self.build_id = self.root.after(1000//FPS, self.build)
+
+    def close(self, p):
+        if self.popups.pop(p, None) is None:
+            return
+        p.destroy()
+        if not self.popups and not self.to_build:
+            if self.timer:
+                self.gui.cancel(self.timer)
+                self.timer = None
+            m = self.gui.m
+            m.popup_count = 10
+            m.popup_limit = 10
+            m.finish_event('popup_hell')
+
+    def tick(self):
+        if not self.popups and not self.to_build:
+            self.timer = None
+            return False
+        self.left -= 1
+        self.var.set(f"{self.left}")
+        if self.left <= 0:
+            self.timer = None
+            self.fail()
+            return False
+
+    def fail(self):
+        m = self.gui.m
+        m.popup_count = min(POPUP_MAX, m.popup_count + POPUP_STEP)
+        m.popup_limit += POPUP_STEP
+        if self.build_id:
+            self.root.after_cancel(self.build_id)
+            self.build_id = None
+        self.to_build = 0
+        self.dying.extend(self.popups)
+        self.popups = {}
+        self.reap()
+        self.gui.create_jumpscare(0.5, is_consequence=True)
+        self.gui.later(0.5, self.start, name="popup hell restart")
+
+    def reap(self):
+        self.reap_id = None
+        end = time.perf_counter() + POPUP_FRAME_MS / 1000
+        while self.dying:
+            p = self.dying.pop()
+            if p.winfo_exists():
+                p.destroy()
+            if time.perf_counter() >= end:
+                break
+        if self.dying:
+            self.reap_id = self.root.after(1000//FPS, self.reap)
+
+    def stats(self):
+        return {'open': len(self.popups), 'pending': self.to_build, 'dying': len(self.dying)}
+
+
+class EventQueue(queue.Queue):
+    # wakes the consumer on put instead of making it poll; the wake itself runs on a
+    # helper thread so an input hook never waits on the Tk thread
+    def __init__(self):
+        super().__init__()
+        self.notify = None
+        self.pending = False
+        self.ready = threading.Event()
+        threading.Thread(target=self.wake_loop, daemon=True).start()
+
+    def put(self, item, block=True, timeout=None):
+        item.setdefault('queued', time.perf_counter())
+        super().put(item, block, timeout)
+        if not self.pending:
+            self.pending = True
+            self.ready.set()
+
+    def wake_loop(self):
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            if self.notify:
+                self.notify()
+
+
+class MoveWatch:
+    # one Don't Move window; checked on the listener threads, and the first input over the
+    # thresholds posts a single violation to the GUI queue instead of being polled for
+    def __init__(self, q, min_px=MOVE_MIN_PX, ignored=MOVE_IGNORED_KEYS):
+        self.q = q
+        self.min2 = min_px * min_px
+        self.ignored = frozenset(ignored)
+        self.origin = None
+        self.armed = False
+        self.claim = threading.Lock()
+        self.resolve = None
+
+    def arm(self, origin):
+        self.origin = origin
+        self.armed = True
+
+    def settle(self):
+        # whoever gets here first (a violation or the timeout) owns the outcome
+        self.armed = False
+        return self.claim.acquire(blocking=False)
+
+    def on_mouse(self, pos, click=False):
+        if not self.armed:
+            return
+        if not click and self.min2:
+            dx, dy = pos[0] - self.origin[0], pos[1] - self.origin[1]
+            if dx * dx + dy * dy < self.min2:
+                return
+        self.violate()
+
+    def on_key(self, key):
+        self.on_key_class(capture.key_class(key) if self.ignored else None)
+
+    def on_key_class(self, cls):
+        if not self.armed:
+            return
+        if cls is None or cls not in self.ignored:
+            self.violate()
+
+    def violate(self):
+        if self.armed and self.settle():
+            self.q.put({'event': 'move_violation', 'watch': self})
+
+
+class Typist:
+    # types on its own thread once the target window has focus, paced per key from a deadline;
+    # cancel() stops it between keys and the outcome is posted back through the event queue
+    def __init__(self, q, kb_c, msg, pid=None, window_class="Notepad", rate=TYPE_RATE):
+        self.q = q
+        self.kb_c = kb_c
+        self.msg = msg
+        self.pid = pid
+        self.window_class = window_class
+        self.rate = rate
+        self.cancelled = threading.Event()
+        self.typed = 0
+        self.result = None
+        self.t = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.t.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_target(self, hwnd):
+        # modern Notepad hands off to another process, so the window class is checked as well as the pid
+        if not hwnd:
+            return False
+        try:
+            if self.pid is not None and win32process.GetWindowThreadProcessId(hwnd)[1] == self.pid:
+                return True
+            return win32gui.GetClassName(hwnd) == self.window_class
+        except Exception:
+            return False
+
+    def wait_focus(self, timeout=TYPE_WAIT):
+        end = time.monotonic() + timeout
+        while not self.cancelled.is_set():
+            if self.is_target(win32gui.GetForegroundWindow()):
+                return True
+            if time.monotonic() >= end:
+                return False
+            self.cancelled.wait(TYPE_POLL)
+        return False
+
+    def run(self):
+        try:
+            self.result = self.type()
+        except Exception:
+            self.result = 'failed'
+        self.q.put({'event': 'typing_done', 'typist': self})
+
+    def type(self):
+        gap = 1.0 / self.rate
+        next_at = None
+        for ch in self.msg:
+            if next_at is None or not self.is_target(win32gui.GetForegroundWindow()):
+                if not self.wait_focus():
+                    return 'cancelled' if self.cancelled.is_set() else 'no focus'
+                next_at = time.monotonic()
+            self.kb_c.type(ch)
+            self.typed += 1
+            next_at += gap * random.uniform(1 - TYPE_JITTER, 1 + TYPE_JITTER)
+            if self.cancelled.wait(max(0.0, next_at - time.monotonic())):
+                return 'cancelled'
+        return 'done'
+
+
+class Run:
+    # one event from claim to finish: claimed -> queued -> finished
+    __slots__ = ('event', 'slots', 'span', 'state')
+
+    def __init__(self, event):
+        self.event = event
+        self.slots = EVENT_SLOTS.get(event, ())
+        self.span = None
+        self.state = 'claimed'
+
+
+class Manager:
+    def __init__(self, q, kb_c=None):
+        self.slots = {}
+        self.runs = {}
+        self.claims = 0
+        self.conflicts = 0
         self.q = q
-        self.move_data = {'f': False, 'a': False}
+        self.watch = None
         self.mouse_pos = (0, 0)
-        self.popup_active = False
         self.popup_count = 10
         self.popup_limit = 10
-        self.kb_c = keyboard.Controller()
+        self.kb_c = kb_c
         self.i_paths, self.s_paths, self.e_paths = [], [], []
-        self.load_assets()
+        self.assets = None
+        self.baked = None
+        self.img_cache = ImageCache()
+        self.atlas = EntityAtlas()
+        self.audio = None
+        self.mixer = None
+        self.ready = threading.Event()
+        self.tracer = metrics.Tracer(METRICS_JSONL, METRICS_PROM)
+        self.sampler = EventSampler()
+        self.mode = TRIGGER_MODE
+        self.last_mouse = 0.0
+        self.last_key = 0.0
+        self.screens = []
+        self.windows = None
+        self.effects = effects.EffectPool()
         self.is_active = False
 
+    def prepare(self):
+        # everything here can wait for the countdown, so it runs off the Tk thread after "Begin..."
+        load_modules()
+        if self.kb_c is None:
+            self.kb_c = keyboard.Controller()
+        with STARTUP.phase("scan assets"):
+            self.load_assets()
+        with STARTUP.phase("decode sounds"):
+            self.audio = audio.AudioBank()
+            self.audio.load(self.s_paths)
+            self.mixer = audio.Mixer(audio.make_backend(AUDIO_BACKEND))
+        with STARTUP.phase("window list"):
+            try:
+                reg = windows.WindowRegistry(windows.make_backend(WINDOW_BACKEND))
+                reg.start()
+                self.windows = reg
+            except Exception:
+                self.windows = None
+        self.ready.set()
+        STARTUP.mark("ready to arm")
+        if "--startup-profile" in sys.argv:
+            print(STARTUP.report(), file=sys.stderr)
+        with STARTUP.phase("bake images"):
+            self.baked = bake.BakedImages()
+            self.img_cache.baked = self.baked
+            try:
+                self.baked.bake(bake_jobs(self.i_paths, self.e_paths, self.screens))
+            except Exception:
+                pass
+        if self.screens and self.i_paths:
+            with STARTUP.phase("warm image cache"):
+                self.img_cache.warm(self.i_paths, self.screens)
+        with STARTUP.phase("entity atlas"):
+            self.atlas.baked = self.baked
+            self.atlas.build_all(self.e_paths)
+
     def arm(self):
         self.is_active = True
+        if self.assets:
+            threading.Thread(target=self.assets.watch, args=(ASSET_POLL,), daemon=True).start()
+        if self.mode == "hazard":
+            threading.Thread(target=self.hazard_loop, daemon=True).start()
 
     def load_assets(self):
-        if os.path.isdir(IMAGE_DIR):
-            self.i_paths.extend([os.path.join(IMAGE_DIR, f) for f in os.listdir(IMAGE_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))])
-        
-        if os.path.isdir(SOUND_DIR):
-            self.s_paths.extend([os.path.join(SOUND_DIR, f) for f in os.listdir(SOUND_DIR) if f.lower().endswith('.wav')])
-        else:
-            create_temp_wav(FALLBACK_FILE)
-            self.s_paths.append(FALLBACK_FILE)
-        
-        if os.path.isdir(ENTITY_DIR):
-            self.e_paths.extend([os.path.join(ENTITY_DIR, f) for f in os.listdir(ENTITY_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))])
+        if self.assets is None:
+            self.assets = assets.AssetIndex({
+                'image': (IMAGE_DIR, assets.IMAGE_EXTS),
+                'sound': (SOUND_DIR, assets.SOUND_EXTS),
+                'entity': (ENTITY_DIR, assets.IMAGE_EXTS),
+            }, MANIFEST_FILE, self.on_assets_changed)
+        self.assets.scan()
+        self.i_paths[:] = self.assets.paths('image')
+        self.e_paths[:] = self.assets.paths('entity')
+        self.s_paths[:] = self.assets.paths('sound')
+        self.check_sounds()
+
+    def check_sounds(self):
+        real = [p for p in self.s_paths if not p.startswith('synth:')]
+        if not real:
+            self.s_paths[:] = [f"synth:{name}" for name in FALLBACK_SOUNDS]
+        elif len(real) != len(self.s_paths):
+            self.s_paths[:] = real
+
+    def asset_paths(self, kind):
+        return {'image': self.i_paths, 'sound': self.s_paths, 'entity': self.e_paths}[kind]
+
+    def on_assets_changed(self, added, removed):
+        for kind, ps in removed.items():
+            paths = self.asset_paths(kind)
+            for p in ps:
+                if p in paths:
+                    paths.remove(p)
+        for kind, ps in added.items():
+            self.asset_paths(kind).extend(ps)
+        self.check_sounds()
+        if added.get('image') and self.screens:
+            self.img_cache.warm(added['image'], self.screens)
+        for p in removed.get('entity', ()):
+            self.atlas.drop(p)
+        self.atlas.build_all(added.get('entity', ()))
+
+    def is_animated(self, p):
+        e = self.assets.entries.get(p) if self.assets else None
+        return bool(e and (e.get('frames') or 1) > 1)
+
+    def quarantine(self, p):
+        for paths in (self.i_paths, self.s_paths, self.e_paths):
+            try:
+                paths.remove(p)
+            except ValueError:
+                pass
+        self.atlas.drop(p)
+        if self.assets:
+            self.assets.quarantine(p)
+        self.check_sounds()
 
     def update_mouse_pos(self, x, y):
         self.mouse_pos = (x, y)
 
-    def on_mouse(self):
+    def on_mouse(self, click=False):
         if not self.is_active:
             return
-            
-        if self.active == "dont_move" and self.move_data.get('a'):
-            self.move_data['f'] = True
-        elif self.active is None:
+
+        w = self.watch
+        if w is not None and w.armed:
+            w.on_mouse(self.mouse_pos, click)
+        elif self.mode == "hazard":
+            self.last_mouse = time.monotonic()
+        else:
             self.check_random_horror(check_typing=True)
 
     def on_press(self, key):
         if not self.is_active:
             return True
-            
-        triggered = False
 
-        if self.active == "dont_move" and self.move_data.get('a'):
-            self.move_data['f'] = True
-        
-        elif self.active is None:
-            if random.randint(1, TYPING_CHANCE_KEY) == 1:
-                if self.lock.acquire(blocking=False):
-                    try:
-                        self.active = "typing_possession"
-                        self.q.put({'event': 'typing_possession'})
-                        triggered = True
-                    except Exception:
-                        self.lock.release()
-            
-            if not triggered:
-                self.check_random_horror(check_typing=True)
+        w = self.watch
+        if w is not None and w.armed:
+            w.on_key(key)
+        elif self.typing():
+            pass
+        elif self.mode == "hazard":
+            self.last_key = time.monotonic()
+        else:
+            self.check_random_horror(check_typing=True, from_key=True)
 
         return True
 
-    def check_random_horror(self, check_typing=False):
-        if self.lock.acquire(blocking=False):
-            hell_triggered = False
-            try:
-                if check_typing and random.randint(1, TYPING_CHANCE_GENERAL) == 1:
-                    self.active = "typing_possession"
-                    self.q.put({'event': 'typing_possession'})
-                elif random.randint(1, BROWSER_CHANCE) == 1:
-                    self.active = "browser_hijack"
-                    self.q.put({'event': 'browser_hijack'})
-                elif random.randint(1, TIME_CHANCE) == 1:
-                    self.active = "time_warp"
-                    self.q.put({'event': 'time_warp'})
-                elif random.randint(1, FLIP_CHANCE) == 1:
-                    self.active = "screen_flip"
-                    self.q.put({'event': 'screen_flip'})
-                elif random.randint(1, SWAP_CHANCE) == 1:
-                    self.active = "window_swap"
-                    self.q.put({'event': 'window_swap'})
-                elif random.randint(1, RPS_CHANCE) == 1 and not self.popup_active:
-                    self.active = "rps_game"
-                    self.q.put({'event': 'rps_game'})
-                elif random.randint(1, POPUP_CHANCE) == 1 and not self.popup_active:
-                    self.popup_active = True
-                    hell_triggered = True
-                    self.q.put({'event': 'popup_hell'})
-                elif random.randint(1, MOVE_CHANCE) == 1:
-                    self.active = "dont_move"
-                    self.move_data = {'f': False, 'a': False}
-                    self.q.put({'event': 'dont_move'})
-                elif random.randint(1, JUMPSCARE_CHANCE) == 1:
-                    self.active = "jumpscare"
-                    self.q.put({'event': 'jumpscare', 'duration': 0.3})
-                elif random.randint(1, ENTITY_CHANCE) == 1:
-                    self.active = "entity"
-                    target = self.mouse_pos
-                    self.q.put({'event': 'entity', 'target': target})
-                else:
-                    self.lock.release()
-            except Exception:
-                self.lock.release()
-            
-            if hell_triggered:
-                self.lock.release()
+    def typing(self):
+        #the Typist's keystrokes come back through the hooks; they are not the user's, so they
+        #neither count as activity nor roll events
+        return 'typing_possession' in self.runs
+
+    def on_batch(self, records):
+        # records from the capture process, in order; rolls were drawn there and are only
+        # resolved here against the live tags, so the odds match the in-process listeners
+        now = time.monotonic()
+        for t, kind, x, y in records:
+            if not capture.valid(kind, x):
+                continue
+            w = self.watch
+            armed = w is not None and w.armed
+            if kind == capture.ROLL:
+                if self.is_active and not armed and self.mode != "hazard" and not (y and self.typing()):
+                    event = self.sampler.sample(self.roll_tags(check_typing=True, from_key=bool(y)), x / capture.ROLL_SCALE)
+                    if event is not None:
+                        self.trigger(event, t)
+            elif kind == capture.KEY:
+                if not self.is_active:
+                    continue
+                if armed:
+                    w.on_key_class(capture.KEY_CLASSES[x])
+                elif self.mode == "hazard" and not self.typing():
+                    self.last_key = now
+            else:
+                self.mouse_pos = (x, y)
+                if not self.is_active:
+                    continue
+                if armed:
+                    w.on_mouse(self.mouse_pos, kind == capture.CLICK)
+                elif self.mode == "hazard":
+                    self.last_mouse = now
+
+    def roll_tags(self, check_typing=False, from_key=False):
+        tags = []
+        if from_key: tags.append('key')
+        if check_typing: tags.append('typing')
+        if 'popup' not in self.slots: tags.append('no_popup')
+        return frozenset(tags)
+
+    def check_random_horror(self, check_typing=False, from_key=False):
+        event = self.sampler.sample(self.roll_tags(check_typing, from_key))
+        if event is not None:
+            self.trigger(event, time.perf_counter())
+
+    def hazard_loop(self):
+        # input only marks activity; the odds of an event depend on active time, not on the device polling rate
+        p = 1 - math.exp(-HAZARD_RATE * HAZARD_TICK)
+        deadline = time.monotonic()
+        while self.is_active:
+            deadline += HAZARD_TICK
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            now = time.monotonic()
+            typed = now - self.last_key <= HAZARD_TICK
+            if not typed and now - self.last_mouse > HAZARD_TICK:
+                continue
+            if random.random() >= p:
+                continue
+            event = self.sampler.pick(self.roll_tags(check_typing=True, from_key=typed))
+            if event is not None:
+                self.trigger(event, time.perf_counter())
+
+    def claim(self, run):
+        # dict.setdefault is atomic, so it is the compare-and-set on each slot; a partial
+        # claim is rolled back and nothing ever waits on another thread
+        self.claims += 1
+        if self.runs.setdefault(run.event, run) is not run:
+            self.conflicts += 1
+            return False
+        taken = []
+        for slot in run.slots:
+            if self.slots.setdefault(slot, run) is not run:
+                self.conflicts += 1
+                for s in taken:
+                    del self.slots[s]
+                del self.runs[run.event]
+                return False
+            taken.append(slot)
+        return True
 
-    def finish_event(self):
-        self.active = None
-        if self.lock.locked():
-            self.lock.release()
+    def release(self, run):
+        run.state = 'finished'
+        for slot in run.slots:
+            if self.slots.get(slot) is run:
+                del self.slots[slot]
+        if self.runs.get(run.event) is run:
+            del self.runs[run.event]
+
+    def trigger(self, event, t=None):
+        run = Run(event)
+        if not self.claim(run):
+            return False
+        try:
+            run.span = span = self.tracer.start(event, t)
+            span.mark('claimed')
+            task = {'event': event, 'span': span}
+            if event == 'dont_move':
+                self.watch = MoveWatch(self.q)
+            elif event == 'jumpscare':
+                task['duration'] = 0.3
+            elif event == 'entity':
+                task['target'] = self.mouse_pos
+            run.state = 'queued'
+            span.mark('queued')
+            self.q.put(task)
+            return True
+        except Exception:
+            self.release(run)
+            return False
 
-    def finish_popup(self):
-        self.popup_active = False
+    def finish_event(self, event):
+        run = self.runs.get(event)
+        if run is None or run.state == 'finished':
+            return
+        if event == 'dont_move':
+            self.watch = None
+        self.release(run)
+        self.tracer.finish(run.span)
+
+    def state(self):
+        return {'runs': {e: r.state for e, r in list(self.runs.items())},
+                'slots': {s: r.event for s, r in list(self.slots.items())},
+                'claims': self.claims, 'conflicts': self.conflicts}
 
 
 class GUI:
-    def __init__(self, m, ml, kl):
+    def __init__(self, m):
         self.m = m
-        self.ml = ml
-        self.kl = kl
+        self.ml = None
+        self.kl = None
+        self.profiler = None
         self.root = tk.Tk()
         self.w = self.root.winfo_screenwidth()
         self.h = self.root.winfo_screenheight()
-        self.popups = []
-        self.timer_id = None
+        self.primary = Monitor(0, 0, self.w, self.h, None)
+        self.monitors = [self.primary]
+        self.m.screens = [(self.w, self.h)]
         self.countdown = 0
         self.tray = None
+        self.q_latency = deque(maxlen=256)
+        self.anim = Animator(self.root)
+        self.timers = timers.TimerWheel()
+        self.timers.on_error = self.root.report_callback_exception
+        self.timer_job = None
+        self.timer_at = None
+        self.count_end = 0.0
+        self.typist = None
+        self.overlays = OverlayPool(self.root)
+        self.hell = PopupHell(self)
+        self.root.bind('<<NudgeWake>>', self.process_queue)
+        if hasattr(self.m.q, 'notify'):
+            self.m.q.notify = self.wake
         self.setup_panel()
 
     def setup_panel(self):
@@ -243,13 +1291,21 @@ class GUI:
             total = (h * 3600) + (m * 60) + s
             if total <= 0:
                 raise ValueError
+            load_modules()
+            if keyboard is None or win32api is None or pystray is None:
+                self.err_l.config(text="Missing dependencies, see requirements.txt.")
+                return
             self.err_l.config(text="")
+            self.detect_monitors()
             self.countdown = int(total)
             self.root.withdraw()
-            self.ml.start()
-            self.kl.start()
+            self.ml, self.kl = make_listeners(self.m)
+            for l in (self.ml, self.kl):
+                if l: l.start()
+            threading.Thread(target=self.m.prepare, daemon=True).start()
             threading.Thread(target=self.start_tray, daemon=True).start()
-            self.root.after(1000, self.update_countdown)
+            self.count_end = time.monotonic() + self.countdown
+            self.every(1.0, self.update_countdown, name="countdown")
         except ValueError:
             self.err_l.config(text="Please enter valid, positive numbers.")
 
@@ -262,11 +1318,31 @@ class GUI:
 
     def start_tray(self):
         def on_quit(icon, item):
+            if self.profiler and self.profiler.running:
+                self.profiler.stop()
             icon.stop()
             self.root.quit()
 
+        def on_metrics(icon, item):
+            self.m.q.put({'event': 'show_metrics'})
+
+        def on_profile(icon, item):
+            #built on first use, so there is nothing sampling or tracing until someone asks
+            if self.profiler is None:
+                self.profiler = profiler.Profiler((GUI, Manager, Animator, make_listeners), PROFILE_PREFIX,
+                                                  whole=(PopupHell, Typist, OverlayPool, effects.EffectPool))
+            if self.profiler.running:
+                report, _ = self.profiler.stop()
+                icon.notify(f"Profile written to {report}", "NUDGE")
+            else:
+                self.profiler.start()
+            icon.update_menu()
+
         img = self.create_tray_img()
-        menu = pystray.Menu(pystray.MenuItem('Quit NUDGE', on_quit))
+        menu = pystray.Menu(
+            pystray.MenuItem('Show Metrics', on_metrics),
+            pystray.MenuItem(lambda item: 'Stop Profiler' if self.profiler and self.profiler.running else 'Start Profiler', on_profile),
+            pystray.MenuItem('Quit NUDGE', on_quit))
         self.tray = pystray.Icon("NUDGE", img, "NUDGE", menu)
         h = self.countdown // 3600
         m = (self.countdown % 3600) // 60
@@ -275,231 +1351,375 @@ class GUI:
         self.tray.run()
 
     def update_countdown(self):
+        #read off the deadline instead of counted down, so a late tick never drifts the clock
+        self.countdown = max(0, round(self.count_end - time.monotonic()))
         if self.countdown > 0:
-            self.countdown -= 1
             h = self.countdown // 3600
             m = (self.countdown % 3600) // 60
             s = self.countdown % 60
             new_title = f"NUDGE starts in {h}:{m:02d}:{s:02d}"
             if self.tray:
                 self.tray.title = new_title
-            self.root.after(1000, self.update_countdown)
-        else:
-            if self.tray:
-                self.tray.title = "NUDGE IS ACTIVE"
-            self.m.arm()
+            return
+        if self.activate() is not False:
+            self.every(0.1, self.activate, name="wait for assets")
+        return False
+
+    def activate(self):
+        if not self.m.ready.is_set():
+            return
+        if self.tray:
+            self.tray.title = "NUDGE IS ACTIVE"
+        self.overlays.fill(self.targets())
+        self.m.arm()
+        return False
+
+    def later(self, delay, fn, *args, name=None):
+        t = self.timers.call_later(delay, fn, *args, name=name)
+        self.rearm()
+        return t
+
+    def every(self, period, fn, *args, name=None):
+        t = self.timers.every(period, fn, *args, name=name)
+        self.rearm()
+        return t
+
+    def cancel(self, t):
+        if t is not None and self.timers.cancel(t):
+            self.rearm()
+
+    def rearm(self):
+        # one Tk timer for the whole wheel, always aimed at its earliest deadline
+        due = self.timers.next_deadline()
+        if due == self.timer_at:
+            return
+        if self.timer_job:
+            self.root.after_cancel(self.timer_job)
+            self.timer_job = None
+        self.timer_at = due
+        if due is not None:
+            self.timer_job = self.root.after(max(0, math.ceil((due - time.monotonic()) * 1000)), self.pump)
+
+    def pump(self):
+        self.timer_job = self.timer_at = None
+        self.timers.advance()
+        self.rearm()
 
     def run(self):
         self.process_queue()
+        self.root.after_idle(self.on_panel_shown)
         self.root.mainloop()
 
-    def process_queue(self):
+    def on_panel_shown(self):
+        STARTUP.mark("control panel shown")
+        threading.Thread(target=load_modules, daemon=True).start()
+
+    def wake(self):
         try:
-            task = self.m.q.get_nowait()
-            event = task.get('event')
-            if event == 'jumpscare':
-                self.create_jumpscare(task['duration'])
-            elif event == 'dont_move':
-                self.create_dont_move()
-            elif event == 'entity':
-                self.create_entity(task.get('target', (self.w / 2, self.h / 2)))
-            elif event == 'popup_hell':
-                self.create_popup_hell()
-            elif event == 'rps_game':
-                self.create_rps_game()
-            elif event == 'window_swap':
-                self.create_window_swap()
-            elif event == 'screen_flip':
-                self.create_screen_flip()
-            elif event == 'time_warp':
-                self.create_time_warp()
-            elif event == 'browser_hijack':
-                self.create_browser_hijack()
-            elif event == 'typing_possession':
-                self.create_typing_possession()
-        except queue.Empty:
-            pass
-        finally:
-            self.root.after(50, self.process_queue)
+            self.root.event_generate('<<NudgeWake>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            self.m.q.pending = False
 
-    def create_overlay(self):
-        o = tk.Toplevel(self.root)
-        o.geometry(f"{self.w}x{self.h}+0+0")
-        o.overrideredirect(True)
-        o.wm_attributes("-topmost", True)
-        o.wm_attributes("-transparentcolor", KEY)
-        o.config(bg=KEY)
-        c = tk.Canvas(o, width=self.w, height=self.h, bg=KEY, highlightthickness=0)
-        c.pack()
-        return o, c
+    def process_queue(self, e=None):
+        self.m.q.pending = False
+        while True:
+            try:
+                task = self.m.q.get_nowait()
+            except queue.Empty:
+                break
+            if 'queued' in task:
+                self.q_latency.append(time.perf_counter() - task['queued'])
+            span = task.get('span')
+            if span:
+                span.mark('dispatched')
+            try:
+                self.dispatch(task)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+                #a handler that dies must not keep its slots claimed for the rest of the session
+                self.m.finish_event(task.get('event'))
+            if span:
+                span.mark('handled')
+                self.root.after_idle(span.mark, 'first_frame')
+
+    def dispatch(self, task):
+        event = task.get('event')
+        if event == 'jumpscare':
+            self.create_jumpscare(task['duration'])
+        elif event == 'dont_move':
+            self.create_dont_move()
+        elif event == 'entity':
+            self.create_entity(task.get('target', self.m.mouse_pos), task.get('count', 1))
+        elif event == 'popup_hell':
+            self.create_popup_hell()
+        elif event == 'rps_game':
+            self.create_rps_game()
+        elif event == 'window_swap':
+            self.create_window_swap()
+        elif event == 'screen_flip':
+            self.create_screen_flip()
+        elif event == 'time_warp':
+            self.create_time_warp()
+        elif event == 'browser_hijack':
+            self.create_browser_hijack()
+        elif event == 'typing_possession':
+            self.create_typing_possession()
+        elif event == 'move_violation':
+            task['watch'].resolve(True)
+        elif event == 'typing_done':
+            self.typing_done(task['typist'])
+        elif event == 'effect_done':
+            task['then'](task['future'])
+        elif event == 'show_metrics':
+            self.show_metrics()
+
+    def show_metrics(self):
+        self.m.tracer.export(METRICS_PROM)
+        lat = sorted(self.q_latency)
+        extra = [
+            f"queue wait p50={lat[len(lat) // 2] * 1000:.2f}ms max={lat[-1] * 1000:.2f}ms" if lat else "queue wait: no samples",
+            f"image cache: {self.m.img_cache.stats()}",
+            f"animator: {self.anim.stats()}",
+            f"entity atlas: {self.m.atlas.stats()}",
+            f"timers: {self.timers.stats()}",
+            f"events: {self.m.state()}",
+            f"effects: {self.m.effects.stats()}",
+            f"profiler: {self.profiler.stats() if self.profiler else 'off'}",
+        ] + ([f"input capture: {self.ml.stats()}"] if isinstance(self.ml, capture.Capture) else []) + [f"  {name} in {left:.1f}s" + (f" every {period:g}s" if period else "") for left, name, period in self.timers.pending()]
+        win = tk.Toplevel(self.root)
+        win.title("NUDGE Metrics")
+        win.wm_attributes("-topmost", True)
+        tk.Label(win, text=self.m.tracer.summary() + "\n\n" + "\n".join(extra), font=("Courier New", 9), justify="left", anchor="w").pack(padx=10, pady=10)
+        tk.Button(win, text="Close", command=win.destroy).pack(pady=(0, 10))
+
+    def detect_monitors(self):
+        self.monitors = enum_monitors() or [self.primary]
+        self.primary = self.monitors[0]
+        #distinct resolutions, so identical displays share one scaled image
+        self.m.screens = list(dict.fromkeys((mon.w, mon.h) for mon in self.monitors))
+
+    def monitor_at(self, x, y):
+        for mon in self.monitors:
+            if mon.x <= x < mon.x + mon.w and mon.y <= y < mon.y + mon.h:
+                return mon
+        return self.primary
+
+    def cursor_monitor(self):
+        return self.monitor_at(*self.m.mouse_pos)
+
+    def targets(self):
+        if OVERLAY_TARGET == "cursor":
+            return [self.cursor_monitor()]
+        if OVERLAY_TARGET == "primary":
+            return [self.primary]
+        return self.monitors
+
+    def random_spot(self, w, h, mon):
+        return f"{w}x{h}+{mon.x + random.randint(0, max(0, mon.w - w))}+{mon.y + random.randint(0, max(0, mon.h - h))}"
+
+    def on_done(self, fut, then):
+        # the follow-up runs on the Tk thread once the future settles; nothing ever waits on it
+        fut.add_done_callback(lambda f: self.m.q.put({'event': 'effect_done', 'future': f, 'then': then}))
+
+    def create_overlay(self, mon=None):
+        return self.overlays.acquire(mon or self.primary)
+
+    def create_overlays(self):
+        return [self.create_overlay(mon) + (mon,) for mon in self.targets()]
 
     def play_sound(self):
         if self.m.s_paths:
             f = random.choice(self.m.s_paths)
-            winsound.PlaySound(f, winsound.SND_FILENAME | winsound.SND_ASYNC)
-
-    def show_content(self, c):
+            if self.m.mixer is None:
+                return None
+            try:
+                buf = self.m.audio.get(f)
+            except Exception:
+                self.m.quarantine(f)
+                return None
+            return self.m.mixer.play(buf)
+        return None
+
+    def show_content(self, c, mon=None, p=None, players=None, retry=True):
+        # returns the image used so the other displays of the same event show it too; players
+        # maps (path, size) to the animation already decoding for that group
+        mon = mon or self.primary
         c.delete("all")
         if not self.m.i_paths:
-            c.config(bg=BLACK)
-            w, h = self.w, self.h
-            r = w // 8
-            c.create_oval(w//4 - r, h//3 - r, w//4 + r, h//3 + r, fill=RED, outline="")
-            c.create_oval(w*3//4 - r, h//3 - r, w*3//4 + r, h//3 + r, fill=RED, outline="")
-            mouth = [w//4, h*2//3, w*3//4, h*2//3, w//2, h*5//6]
-            c.create_polygon(mouth, fill=RED, outline="")
-        else:
-            try:
+            self.show_face(c, mon)
+            return None
+        t0 = time.perf_counter()
+        try:
+            if p is None:
                 p = random.choice(self.m.i_paths)
-                img = Image.open(p)
-                w, h = img.size
-                a_s = self.w / self.h
-                a_i = w / h
-                if a_i > a_s:
-                    n_h = self.h
-                    n_w = int(n_h * a_i)
+                self.m.img_cache.preload(p, [(o.w, o.h) for o in self.targets()])
+            else:
+                self.m.img_cache.preload(p, [(mon.w, mon.h)])
+        except Exception:
+            #only a file that fails to decode is quarantined, and only one other image is tried
+            self.m.quarantine(p)
+            if retry:
+                return self.show_content(c, mon, players=players, retry=False)
+            self.show_face(c, mon)
+            return None
+        try:
+            c.photo = self.m.img_cache.photo(p, (mon.w, mon.h))
+            c.config(bg=BLACK)
+            item = c.create_image(mon.w//2, mon.h//2, image=c.photo)
+            if self.m.is_animated(p):
+                #the cached still is frame 0, so an animation starts as fast as a static image
+                key = (p, (mon.w, mon.h))
+                player = players.get(key) if players is not None else None
+                if player is not None:
+                    player.attach(c, item)
                 else:
-                    n_w = self.w
-                    n_h = int(n_w / a_i)
-                img = img.resize((n_w, n_h), Image.Resampling.LANCZOS)
-                self.photo = ImageTk.PhotoImage(img)
-                c.config(bg=BLACK)
-                c.create_image(self.w//2, self.h//2, image=self.photo)
-            except Exception:
-                self.m.i_paths.clear()
-                self.show_content(c)
+                    player = FramePlayer(c, item, frames.FrameStream(p, key[1], 'cover'))
+                    self.anim.add(player)
+                    if players is not None:
+                        players[key] = player
+        except Exception:
+            #Tk or memory trouble is not the file's fault: keep it, and show the face this time
+            self.root.report_callback_exception(*sys.exc_info())
+            c.delete("all")
+            self.show_face(c, mon)
+            return p
+        #idle callbacks run after Tk has redrawn, so this marks the first visible frame
+        self.root.after_idle(lambda: self.m.img_cache.record_frame(t0))
+        return p
+
+    def show_face(self, c, mon):
+        c.config(bg=BLACK)
+        w, h = mon.w, mon.h
+        r = w // 8
+        c.create_oval(w//4 - r, h//3 - r, w//4 + r, h//3 + r, fill=RED, outline="")
+        c.create_oval(w*3//4 - r, h//3 - r, w*3//4 + r, h//3 + r, fill=RED, outline="")
+        mouth = [w//4, h*2//3, w*3//4, h*2//3, w//2, h*5//6]
+        c.create_polygon(mouth, fill=RED, outline="")
+
+    def show_group(self, group):
+        #displays with the same resolution share one decode of an animation
+        p, players = None, {}
+        for _, c, mon in group:
+            p = self.show_content(c, mon, p, players)
 
     def create_jumpscare(self, duration, is_consequence=False):
-        o, c = self.create_overlay()
-        self.play_sound()
-        self.show_content(c)
+        group = self.create_overlays()
+        v = self.play_sound()
+        self.show_group(group)
         if not is_consequence:
-            self.root.after(int(duration * 1000), lambda: [o.destroy(), winsound.PlaySound(None, winsound.SND_PURGE), self.m.finish_event()])
+            self.later(duration, lambda: [self.overlays.release_all(group), self.m.mixer.stop(v), self.m.finish_event('jumpscare')], name="jumpscare")
         else:
-            self.root.after(int(duration * 1000), lambda: [o.destroy(), winsound.PlaySound(None, winsound.SND_PURGE)])
+            self.later(duration, lambda: [self.overlays.release_all(group), self.m.mixer.stop(v)], name="jumpscare")
 
     def create_dont_move(self):
-        o, c = self.create_overlay()
-        c.create_text(self.w/2, self.h/2, text=MOVE_TEXT, fill=RED, font=("Arial", 60, "bold"))
-        
-        def start_d():
-            self.m.move_data['a'] = True
-            check_f(time.time() + 3)
-            
-        def check_f(end_time):
-            if not o.winfo_exists():
-                self.m.finish_event()
-                return
-            if self.m.move_data['f']:
-                self.play_sound()
-                self.show_content(c)
-                self.root.after(500, lambda: [o.destroy(), winsound.PlaySound(None, winsound.SND_PURGE), self.m.finish_event()])
-            elif time.time() >= end_time:
-                o.destroy()
-                self.m.finish_event()
+        group = self.create_overlays()
+        for _, c, mon in group:
+            c.create_text(mon.w/2, mon.h/2, text=MOVE_TEXT, fill=RED, font=("Arial", 60, "bold"))
+        w = self.m.watch
+
+        def resolve(moved):
+            if not all(self.overlays.in_use(o) for o, _, _ in group):
+                self.overlays.release_all(group)
+                self.m.finish_event('dont_move')
+            elif moved:
+                v = self.play_sound()
+                self.show_group(group)
+                self.later(0.5, lambda: [self.overlays.release_all(group), self.m.mixer.stop(v), self.m.finish_event('dont_move')], name="don't move")
             else:
-                self.root.after(1000//FPS, lambda: check_f(end_time))
-                
-        self.root.after(1000, start_d)
-
-    def create_entity(self, target_pos):
-        o, c = self.create_overlay()
-        h_w = o.winfo_id()
-        style = win32gui.GetWindowLong(h_w, win32con.GWL_EXSTYLE)
-        win32gui.SetWindowLong(h_w, win32con.GWL_EXSTYLE, style | win32con.WS_EX_TRANSPARENT)
-        w, h = 100, 200
-        speed = random.randint(8, 12)
-        edge = random.randint(0, 3)
-        if edge == 0: start_x, start_y = random.randint(0, self.w - w), -h
-        elif edge == 1: start_x, start_y = self.w, random.randint(0, self.h - h)
-        elif edge == 2: start_x, start_y = random.randint(0, self.w - w), self.h
-        else: start_x, start_y = -w, random.randint(0, self.h - h)
-        t_x, t_y = target_pos
-        angle = math.atan2(t_y - (start_y + h / 2), t_x - (start_x + w / 2))
-        vx = math.cos(angle) * speed
-        vy = math.sin(angle) * speed
-        body = None
-        if self.m.e_paths:
-            try:
-                p = random.choice(self.m.e_paths)
-                img = Image.open(p).resize((w, h), Image.Resampling.LANCZOS)
-                self.e_photo = ImageTk.PhotoImage(img)
-                body = c.create_image(start_x, start_y, image=self.e_photo, anchor='nw')
-            except Exception: self.m.e_paths.clear()
-        if body is None: body = c.create_rectangle(start_x, start_y, start_x + w, start_y + h, fill="#141414", outline="")
-        
-        def animate():
-            if not o.winfo_exists(): self.m.finish_event(); return
-            c.move(body, vx, vy)
-            coords = c.coords(body)
-            if not coords: o.destroy(); self.m.finish_event(); return
-            ex, ey = coords[0], coords[1]
-            ex2, ey2 = ex + w, ey + h
-            mx, my = o.winfo_pointerxy()
-            if ex < mx < ex2 and ey < my < ey2:
-                self.play_sound()
-                self.show_content(c)
-                win32gui.SetWindowLong(h_w, win32con.GWL_EXSTYLE, style & ~win32con.WS_EX_TRANSPARENT)
-                self.root.after(500, lambda: [o.destroy(), winsound.PlaySound(None, winsound.SND_PURGE), self.m.finish_event()])
-                return
-            if ex + w/2 < -w or ex + w/2 > self.w + w or ey + h/2 < -h or ey + h/2 > self.h + h:
-                o.destroy(); self.m.finish_event(); return
-            self.root.after(1000//FPS, animate)
-            
-        animate()
+                self.overlays.release_all(group)
+                self.m.finish_event('dont_move')
 
-    def create_popup_hell(self):
-        t_left = self.m.popup_limit
-        
-        def on_close(p):
-            if p in self.popups:
-                self.popups.remove(p)
-            p.destroy()
-            if not self.popups:
-                if self.timer_id:
-                    self.root.after_cancel(self.timer_id)
-                    self.timer_id = None
-                self.m.popup_count = 10
-                self.m.popup_limit = 10
-                self.m.finish_popup()
-
-        for _ in range(self.m.popup_count):
-            p = tk.Toplevel(self.root)
-            p.geometry(f"200x100+{random.randint(0, self.w-200)}+{random.randint(0, self.h-100)}")
-            p.wm_attributes("-topmost", True)
-            p.title("Close It")
-            p.protocol("WM_DELETE_WINDOW", lambda p=p: on_close(p))
-            tk.Label(p, text=f"{t_left}", font=("Arial", 16), fg='red').pack(pady=5)
-            tk.Button(p, text="Close", command=lambda p=p: on_close(p)).pack(pady=5)
-            self.popups.append(p)
-
-        def update_timer(current_time):
-            if not self.popups: return
-            for p in self.popups:
-                if p.winfo_exists():
-                    for w in p.winfo_children():
-                        if isinstance(w, tk.Label):
-                            w.config(text=f"{current_time}", fg='red')
-
-            if current_time <= 0:
-                self.m.popup_count += 5
-                self.m.popup_limit += 5
-                while self.popups:
-                    p = self.popups.pop()
-                    if p.winfo_exists():
-                        p.destroy()
-                self.timer_id = None
-                self.create_jumpscare(0.5, is_consequence=True)
-                self.root.after(500, self.create_popup_hell)
-                return
+        def timeout():
+            if w.settle():
+                resolve(False)
+
+        def start_d():
+            w.arm(self.m.mouse_pos)
+            self.later(3, timeout, name="don't move window")
+
+        w.resolve = resolve
+        self.later(1, start_d, name="don't move grace")
+
+    def create_entity(self, target_pos, count=1):
+        #entities chase the cursor, so they live on the display it is on, in that display's coordinates
+        mon = self.monitor_at(*target_pos)
+        o, c = self.create_overlay(mon)
+        self.overlays.set_click_through(o, True)
+        pointer = lambda: (self.m.mouse_pos[0] - mon.x, self.m.mouse_pos[1] - mon.y)
+        sprites = []
+        state = {'left': count, 'hit': False}
+
+        def on_hit(s):
+            if state['hit']: return
+            state['hit'] = True
+            for other in sprites: other.done = True
+            v = self.play_sound()
+            self.show_content(c, mon)
+            self.overlays.set_click_through(o, False)
+            self.later(0.5, lambda: [self.overlays.release(o), self.m.mixer.stop(v), self.m.finish_event('entity')], name="entity")
+
+        def on_exit(s):
+            state['left'] -= 1
+            if state['left'] == 0 and not state['hit']:
+                self.overlays.release(o)
+                self.m.finish_event('entity')
 
-            self.timer_id = self.root.after(1000, lambda: update_timer(current_time - 1))
+        try:
+            self.spawn_entities(c, mon, target_pos, count, pointer, sprites, on_hit, on_exit)
+        except Exception:
+            for s in sprites: s.done = True
+            self.overlays.release(o)
+            raise
+
+    def spawn_entities(self, c, mon, target_pos, count, pointer, sprites, on_hit, on_exit):
+        atlas = self.m.atlas
+        atlas.prune()
+        for _ in range(count):
+            speed = random.randint(8, 12) * FPS
+            edge = random.randint(0, 3)
+            si = random.randrange(len(atlas.scales))
+            w, h = atlas.size(si)
+            if edge == 0: start_x, start_y = random.randint(0, mon.w - w), -h
+            elif edge == 1: start_x, start_y = mon.w, random.randint(0, mon.h - h)
+            elif edge == 2: start_x, start_y = random.randint(0, mon.w - w), mon.h
+            else: start_x, start_y = -w, random.randint(0, mon.h - h)
+            t_x, t_y = target_pos[0] - mon.x, target_pos[1] - mon.y
+            angle = math.atan2(t_y - (start_y + h / 2), t_x - (start_x + w / 2))
+            vx = math.cos(angle) * speed
+            vy = math.sin(angle) * speed
+            body, photo = None, None
+            p = random.choice(self.m.e_paths) if self.m.e_paths else None
+            if p is not None and p not in atlas.variants:
+                try:
+                    atlas.build(p)
+                except Exception:
+                    #only a file that fails to decode is quarantined
+                    self.m.quarantine(p)
+                    p = None
+            if p is not None:
+                try:
+                    oi = atlas.orientation(vx, vy)
+                    photo = atlas.photo(p, si, oi)
+                    #rotated variants have a bigger box; keep it centred where the upright one would be
+                    start_x -= (photo.width() - w) / 2
+                    start_y -= (photo.height() - h) / 2
+                    w, h = photo.width(), photo.height()
+                    body = c.create_image(start_x, start_y, image=photo, anchor='nw')
+                    if self.m.is_animated(p):
+                        self.anim.add(FramePlayer(c, body, frames.FrameStream(p, atlas.size(si), 'fit', angle=atlas.angle(oi))))
+                except Exception: self.root.report_callback_exception(*sys.exc_info())
+            if body is None: body = c.create_rectangle(start_x, start_y, start_x + w, start_y + h, fill="#141414", outline="")
+            s = EntitySprite(c, body, start_x, start_y, vx, vy, w, h, (mon.w, mon.h), pointer, on_hit, on_exit)
+            s.photo = photo
+            sprites.append(s)
+            self.anim.add(s)
 
-        update_timer(t_left)
+    def create_popup_hell(self):
+        self.hell.start()
 
     def create_rps_game(self):
         p = tk.Toplevel(self.root)
-        p.geometry(f"300x150+{random.randint(0, self.w - 300)}+{random.randint(0, self.h - 150)}")
+        p.geometry(self.random_spot(300, 150, self.cursor_monitor()))
         p.wm_attributes("-topmost", True)
         p.title("CHOOSE")
         p.resizable(False, False)
@@ -513,99 +1733,110 @@ class GUI:
         rps_id = [None]
 
         def handle_choice(c):
-            if rps_id[0]: self.root.after_cancel(rps_id[0]); rps_id[0] = None
+            self.cancel(rps_id[0]); rps_id[0] = None
             for child in btn_f.winfo_children(): child.config(state='disabled')
 
             if c == correct:
                 p.destroy()
-                self.m.finish_event()
+                self.m.finish_event('rps_game')
             else:
                 info_l.config(text="YOU LOST", fg=RED, font=("Arial", 24, "bold"))
                 def consequence():
                     p.destroy()
                     self.m.popup_count = 20
                     self.m.popup_limit = 20
-                    if not self.m.popup_active:
-                        self.m.popup_active = True
-                        self.m.q.put({'event': 'popup_hell'})
-                    self.m.finish_event()
-                self.root.after(1000, consequence)
+                    #hand the popup slot straight over to Popup Hell
+                    self.m.finish_event('rps_game')
+                    self.m.trigger('popup_hell')
+                self.later(1, consequence, name="rps consequence")
+
+        left = [10]
 
-        def update_timer(t):
+        def update_timer():
             if not p.winfo_exists():
-                if rps_id[0]: self.root.after_cancel(rps_id[0])
-                self.m.finish_event()
-                return
-            if t < 0:
+                rps_id[0] = None
+                self.m.finish_event('rps_game')
+                return False
+            left[0] -= 1
+            if left[0] < 0:
                 handle_choice(None)
-                return
-            timer_l.config(text=f"Time remaining: {t}", fg='red')
-            rps_id[0] = self.root.after(1000, lambda: update_timer(t - 1))
+                return False
+            timer_l.config(text=f"Time remaining: {left[0]}", fg='red')
 
         tk.Button(btn_f, text="Rock", command=lambda: handle_choice('rock')).pack(side='left', padx=5)
         tk.Button(btn_f, text="Paper", command=lambda: handle_choice('paper')).pack(side='left', padx=5)
         tk.Button(btn_f, text="Scissors", command=lambda: handle_choice('scissors')).pack(side='left', padx=5)
-        update_timer(10)
+        timer_l.config(text=f"Time remaining: {left[0]}", fg='red')
+        rps_id[0] = self.every(1.0, update_timer, name="rps countdown")
 
     def create_window_swap(self):
-        windows = []
-        def win_handler(hwnd, ctx):
-            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd) != '' and "NUDGE" not in win32gui.GetWindowText(hwnd):
-                windows.append(hwnd)
-        
-        win32gui.EnumWindows(win_handler, None)
-        foreground = win32gui.GetForegroundWindow()
-        others = [hwnd for hwnd in windows if hwnd != foreground]
-        
-        if others:
-            o, c = self.create_overlay()
-            c.config(bg=BLACK)
-            
+        reg = self.m.windows
+        target = None
+        if reg:
+            try:
+                target = reg.pick(exclude=reg.backend.foreground())
+            except Exception:
+                target = None
+
+        if target is not None:
+            group = self.create_overlays()
+            for _, c, _ in group:
+                c.config(bg=BLACK)
+
             def do_swap():
-                new_hwnd = random.choice(others)
                 try:
-                    win32gui.ShowWindow(new_hwnd, win32con.SW_RESTORE)
-                    win32gui.SetForegroundWindow(new_hwnd)
-                except pywintypes.error:
-                    pass
+                    reg.backend.activate(target)
                 except Exception:
-                    pass
+                    reg.discard(target)
 
-                o.destroy()
-                self.m.finish_event()
-            self.root.after(100, do_swap)
+                self.overlays.release_all(group)
+                self.m.finish_event('window_swap')
+            self.later(0.1, do_swap, name="window swap")
         else:
-            self.m.finish_event()
+            self.m.finish_event('window_swap')
 
     def create_screen_flip(self):
-        try:
-            device = win32api.EnumDisplayDevices(None, 0)
-            dm = win32api.EnumDisplaySettings(device.DeviceName, win32con.ENUM_CURRENT_SETTINGS)
-            original = dm.DisplayOrientation
-            new = win32con.DMDO_180 if original == win32con.DMDO_DEFAULT else win32con.DMDO_DEFAULT
-            dm.DisplayOrientation = new
-            dm.Fields = dm.Fields | win32con.DM_DISPLAYORIENTATION
-            win32api.ChangeDisplaySettingsEx(device.DeviceName, dm)
-
-            def revert():
+        devices = [mon.device for mon in self.targets() if mon.device]
+
+        def flip():
+            names = devices
+            if not names:
                 try:
-                    current = win32api.EnumDisplaySettings(device.DeviceName, win32con.ENUM_CURRENT_SETTINGS)
+                    names = [win32api.EnumDisplayDevices(None, 0).DeviceName]
+                except Exception:
+                    names = []
+            flipped = []
+            for name in names:
+                try:
+                    dm = win32api.EnumDisplaySettings(name, win32con.ENUM_CURRENT_SETTINGS)
+                    original = dm.DisplayOrientation
+                    dm.DisplayOrientation = win32con.DMDO_180 if original == win32con.DMDO_DEFAULT else win32con.DMDO_DEFAULT
+                    dm.Fields = dm.Fields | win32con.DM_DISPLAYORIENTATION
+                    win32api.ChangeDisplaySettingsEx(name, dm)
+                    flipped.append((name, original))
+                except Exception:
+                    pass
+            return flipped or None
+
+        def revert(flipped):
+            for name, original in flipped:
+                try:
+                    current = win32api.EnumDisplaySettings(name, win32con.ENUM_CURRENT_SETTINGS)
                     if current.DisplayOrientation != original:
                         current.DisplayOrientation = original
                         current.Fields = current.Fields | win32con.DM_DISPLAYORIENTATION
-                        win32api.ChangeDisplaySettingsEx(device.DeviceName, current)
+                        win32api.ChangeDisplaySettingsEx(name, current)
                 except Exception:
                     pass
-                finally:
-                    self.m.finish_event()
-            
-            self.root.after(5000, revert)
-        except Exception:
-            self.m.finish_event()
+
+        c = self.m.effects.apply("screen flip", flip, revert, hold=5)
+        self.on_done(c.reverted, lambda f: self.m.finish_event('screen_flip'))
 
     def create_time_warp(self):
-        original = win32api.GetLocalTime()
-        try:
+        def warp():
+            #wall clock and monotonic clock together, so the revert lands on the real time, not 8 s behind
+            before = (time.time(), time.monotonic())
+            original = win32api.GetLocalTime()
             new = (
                 original[0] + random.randint(-5, 5),
                 random.randint(1, 12),
@@ -616,28 +1847,31 @@ class GUI:
                 random.randint(0, 59),
                 original[7]
             )
-            win32api.SetSystemTime(*new)
-            
-            def revert_time():
-                try:
-                    win32api.SetSystemTime(*original)
-                except pywintypes.error as e:
-                    if e.winerror == 1314:
-                        pass
-                except Exception:
+            try:
+                win32api.SetSystemTime(*new)
+            except pywintypes.error as e:
+                if e.winerror == 1314:
+                    return None
+                raise
+            return before
+
+        def revert_time(before):
+            wall, mono = before
+            now = datetime.datetime.fromtimestamp(wall + time.monotonic() - mono, datetime.timezone.utc)
+            try:
+                win32api.SetSystemTime(now.year, now.month, now.isoweekday() % 7, now.day, now.hour, now.minute, now.second, now.microsecond // 1000)
+            except pywintypes.error as e:
+                if e.winerror == 1314:
                     pass
-            self.root.after(8000, revert_time)
 
-        except pywintypes.error as e:
-            if e.winerror == 1314:
-                pass
-        except Exception:
-            pass
+        #the slot is held until the clock is back, so a second warp never records the warped time as "before"
+        c = self.m.effects.apply("time warp", warp, revert_time, hold=8)
+        self.on_done(c.reverted, lambda f: self.m.finish_event('time_warp'))
 
         noti = tk.Toplevel(self.root)
         w, h = 300, 100
-        x = self.w - w - 10
-        y = self.h - h - 40
+        x = self.primary.x + self.primary.w - w - 10
+        y = self.primary.y + self.primary.h - h - 40
         noti.geometry(f"{w}x{h}+{x}+{y}")
         noti.overrideredirect(True)
         noti.wm_attributes("-topmost", True)
@@ -658,8 +1892,7 @@ class GUI:
         def close_noti():
             if noti.winfo_exists():
                 noti.destroy()
-            self.m.finish_event()
-        self.root.after(7000, close_noti)
+        self.later(7, close_noti, name="time warp notification")
 
     def create_browser_hijack(self):
         #urls to open
@@ -670,73 +1903,78 @@ class GUI:
             "https://www.lomando.com/main.html", 
             "https://en.wikipedia.org/wiki/Special:Random"
         ]
-        try:
-            webbrowser.open_new_tab(random.choice(urls))
-        except Exception:
-            pass
-        finally:
-            self.m.finish_event()
+        fut = self.m.effects.submit(webbrowser.open_new_tab, random.choice(urls))
+        self.on_done(fut, lambda f: self.m.finish_event('browser_hijack'))
 
     def create_typing_possession(self):
-        try:
-            subprocess.Popen(['notepad.exe'])
-        except Exception:
-            self.m.finish_event()
-            return
+        #text to type in notepad
+        msgs = [
+            "I see you.", 
+            "You aren't safe.", 
+            "Look behind you.", 
+            "Why did you let this happen?", 
+            "It's all your fault.", 
+            "He is coming.", 
+            "You can't escape me.", 
+            "RUN.",
+            "Turn it off",
+            "Visit zumthezazaking.com",
+        ]
+        msg = random.choice(msgs)
 
-        def type_msg():
-            try:
-                #text to type in notepad
-                msgs = [
-                    "I see you.", 
-                    "You aren't safe.", 
-                    "Look behind you.", 
-                    "Why did you let this happen?", 
-                    "It's all your fault.", 
-                    "He is coming.", 
-                    "You can't escape me.", 
-                    "RUN.",
-                    "Turn it off",
-                    "Visit zumthezazaking.com",
-                ]
-                msg = random.choice(msgs)
-                self.m.kb_c.type(msg)
-            except Exception:
-                pass
-            finally:
-                self.m.finish_event()
+        def launched(f):
+            if f.exception() is not None:
+                self.m.finish_event('typing_possession')
+                return
+            self.typist = Typist(self.m.q, self.m.kb_c, msg, pid=f.result().pid).start()
 
-        self.root.after(1000, type_msg)
+        self.on_done(self.m.effects.submit(subprocess.Popen, ['notepad.exe']), launched)
 
+    def typing_done(self, typist):
+        if self.typist is typist:
+            self.typist = None
+        self.m.finish_event('typing_possession')
 
-def run():
-    if sys.platform != "win32":
-        sys.exit(1)
-    
-    q = queue.Queue()
-    m = Manager(q)
 
+def make_listeners(m):
+    if INPUT_CAPTURE == "process":
+        return capture.Capture(m.on_batch, m.sampler.max_chance(), rolling=m.mode != "hazard"), None
     def on_move_w(x, y): 
         m.update_mouse_pos(x, y)
         m.on_mouse()
     def on_click_w(x, y, button, pressed): 
         m.update_mouse_pos(x, y)
-        m.on_mouse()
-    
+        m.on_mouse(click=True)
+
     ml = mouse.Listener(on_move=on_move_w, on_click=on_click_w)
     kl = keyboard.Listener(on_press=m.on_press, suppress=False)
-    gui = GUI(m, ml, kl)
+    return ml, kl
+
+
+def run():
+    if sys.platform != "win32":
+        sys.exit(1)
+
+    q = EventQueue()
+    m = Manager(q)
+    with STARTUP.phase("control panel"):
+        gui = GUI(m)
     
     try:
         gui.run()
     except KeyboardInterrupt:
         pass
     finally:
-        if ml.is_alive(): ml.stop()
-        if kl.is_alive(): kl.stop()
+        for l in (gui.ml, gui.kl):
+            if l and l.is_alive(): l.stop()
         if gui.tray: gui.tray.stop()
-        ml.join()
-        kl.join()
+        if m.windows: m.windows.stop()
+        if gui.typist: gui.typist.cancel()
+        m.effects.shutdown()
+        m.tracer.close()
+        for l in (gui.ml, gui.kl):
+            if l: l.join()
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    multiprocessing.freeze_support()
+    run()
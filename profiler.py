@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter
+
+PROFILE_INTERVAL = 0.005
+PROFILE_FRAMES = 16
+PROFILE_TOP = 25
+#functions that count as a handler when a sample or an allocation lands inside them
+PROFILE_HANDLERS = ('create_', 'on_', 'tick', 'process_queue', 'hazard_loop')
+
+
+def handler_codes(roots, whole=(), prefixes=PROFILE_HANDLERS):
+    # code objects of every matching function under the roots, and of every method of the whole
+    # classes (work scheduled on its own: popup waves, the typist, the effect pool), with nested
+    # closures (timer callbacks, listener wrappers) credited to the function that defines them
+    codes = {}
+
+    def walk(code, owner, every=False):
+        if owner is None and (every or code.co_name.startswith(prefixes)):
+            owner = code.co_qualname if hasattr(code, 'co_qualname') else code.co_name
+        if owner is not None:
+            codes[code] = owner
+        for c in code.co_consts:
+            if hasattr(c, 'co_code'):
+                walk(c, owner)
+
+    for root in list(roots) + list(whole):
+        fns = vars(root).values() if isinstance(root, type) else (root,)
+        for fn in fns:
+            fn = getattr(fn, 'fget', fn)
+            code = getattr(fn, '__code__', None)
+            if code is not None:
+                walk(code, None, root in whole)
+    return codes
+
+
+class Profiler:
+    # samples every thread's stack from a background thread and traces allocations between
+    # start() and stop(); nothing is hooked while it is not running
+    def __init__(self, roots, prefix="nudge_profile", whole=(), interval=PROFILE_INTERVAL, frames=PROFILE_FRAMES):
+        self.codes = handler_codes(roots, whole)
+        self.lines = {}
+        for code, owner in self.codes.items():
+            for _, _, line in code.co_lines():
+                if line is not None:
+                    self.lines.setdefault((code.co_filename, line), owner)
+        self.prefix = prefix
+        self.interval = interval
+        self.frames = frames
+        self.stopped = threading.Event()
+        self.thread = None
+        self.started = None
+        self.owned_trace = False
+        self.samples = 0
+        self.handlers = Counter()
+        self.leaves = Counter()
+        self.stacks = Counter()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.stopped.clear()
+        self.samples = 0
+        self.handlers.clear()
+        self.leaves.clear()
+        self.stacks.clear()
+        self.started = time.time()
+        self.owned_trace = not tracemalloc.is_tracing()
+        if self.owned_trace:
+            tracemalloc.start(self.frames)
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        me = threading.get_ident()
+        nxt = time.perf_counter()
+        while True:
+            nxt += self.interval
+            if self.stopped.wait(max(0.0, nxt - time.perf_counter())):
+                return
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    self.sample(names.get(ident, str(ident)), frame)
+            self.samples += 1
+
+    def sample(self, thread, frame):
+        handler = None
+        stack = []
+        leaf = frame.f_code
+        while frame is not None:
+            code = frame.f_code
+            if handler is None:
+                handler = self.codes.get(code)
+            stack.append(code.co_name)
+            frame = frame.f_back
+        self.handlers[(thread, handler or '-')] += 1
+        self.leaves[(leaf.co_filename, leaf.co_firstlineno, leaf.co_name)] += 1
+        stack.append(thread)
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        # returns the report paths; the folded stacks load straight into flamegraph.pl or speedscope
+        if not self.running:
+            return None
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        snap = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if self.owned_trace:
+            tracemalloc.stop()
+        elapsed = time.time() - self.started
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        report = f"{self.prefix}_{stamp}.txt"
+        folded = f"{self.prefix}_{stamp}.folded"
+        with open(report, 'w') as f:
+            f.write(self.render(elapsed, snap))
+        with open(folded, 'w') as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        return report, folded
+
+    def allocations(self, snap):
+        # live bytes per handler, from the innermost traceback frame that falls inside one
+        owners = Counter()
+        for tr in snap.traces:
+            owner = '-'
+            for fr in reversed(tr.traceback):
+                o = self.lines.get((fr.filename, fr.lineno))
+                if o is not None:
+                    owner = o
+                    break
+            owners[owner] += tr.size
+        return owners
+
+    def render(self, elapsed, snap):
+        n = max(1, self.samples)
+        out = [f"profile of {elapsed:.1f}s, {self.samples} samples every {self.interval * 1000:g}ms", "",
+               "samples by thread and handler (share of wall time):"]
+        for (thread, handler), c in self.handlers.most_common():
+            out.append(f"  {c / n:7.1%}  {thread:<24} {handler}")
+        out += ["", f"top {PROFILE_TOP} functions on top of the stack:"]
+        for (path, line, name), c in self.leaves.most_common(PROFILE_TOP):
+            out.append(f"  {c:7d}  {name} ({os.path.basename(path)}:{line})")
+        if snap is not None:
+            out += ["", "live allocations by handler:"]
+            for owner, size in self.allocations(snap).most_common():
+                out.append(f"  {size / 1024:10.1f} KiB  {owner}")
+            out += ["", f"top {PROFILE_TOP} allocation sites:"]
+            for st in snap.statistics('lineno')[:PROFILE_TOP]:
+                fr = st.traceback[0]
+                out.append(f"  {st.size / 1024:10.1f} KiB  {st.count:7d} blocks  {os.path.basename(fr.filename)}:{fr.lineno}")
+        return "\n".join(out) + "\n"
+
+    def stats(self):
+        return {'running': self.running, 'samples': self.samples}
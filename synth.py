@@ -0,0 +1,120 @@
+import io
+import wave
+import threading
+
+import numpy as np
+
+RATE = 44100
+PEAK = 0.9
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _t(duration):
+    return np.arange(int(RATE * duration)) / RATE
+
+
+def _envelope(n, attack, release):
+    env = np.ones(n)
+    a = min(n, int(RATE * attack))
+    r = min(n - a, int(RATE * release))
+    if a:
+        env[:a] = np.linspace(0.0, 1.0, a)
+    if r:
+        env[n - r:] = np.linspace(1.0, 0.0, r) ** 2
+    return env
+
+
+def _lowpass(x, cutoff):
+    # brick-wall filter in the frequency domain, one pass over the whole buffer
+    spec = np.fft.rfft(x)
+    spec[int(len(spec) * cutoff / (RATE / 2)):] = 0
+    return np.fft.irfft(spec, len(x))
+
+
+def _osc(freq):
+    # freq is a per-sample array, so sweeps and vibrato integrate into a continuous phase
+    return 2 * np.pi * np.cumsum(freq) / RATE
+
+
+def _norm(x):
+    m = np.max(np.abs(x))
+    return x * (PEAK / m) if m else x
+
+
+def static(duration=1.0, rng=None):
+    rng = rng or np.random.default_rng()
+    n = int(RATE * duration)
+    x = rng.uniform(-1.0, 1.0, n)
+    #slow flutter plus sparse crackle so it does not sound like plain white noise
+    flutter = 0.6 + 0.4 * np.sin(_osc(np.full(n, 7.0)) + rng.uniform(0, np.pi))
+    crackle = (rng.random(n) < 0.002) * rng.uniform(-1.0, 1.0, n) * 3
+    return _norm((x * flutter + crackle) * _envelope(n, 0.005, 0.05))
+
+
+def scream(duration=1.5, rng=None):
+    rng = rng or np.random.default_rng()
+    t = _t(duration)
+    n = len(t)
+    base = rng.uniform(500, 750)
+    sweep = base * (1 + 0.8 * t / duration) + 40 * np.sin(2 * np.pi * 6.5 * t)
+    phase = _osc(sweep)
+    voice = sum(np.sin(k * phase) / k for k in range(1, 7))
+    breath = _lowpass(rng.uniform(-1.0, 1.0, n), 4000) * 0.6
+    x = np.tanh(2.5 * (voice + breath))
+    return _norm(x * _envelope(n, 0.02, duration * 0.3))
+
+
+def drone(duration=4.0, rng=None):
+    rng = rng or np.random.default_rng()
+    t = _t(duration)
+    n = len(t)
+    root = rng.uniform(45, 60)
+    x = sum(np.sin(2 * np.pi * root * r * t + rng.uniform(0, np.pi)) for r in (1.0, 1.007, 1.5, 2.013))
+    rumble = _lowpass(rng.uniform(-1.0, 1.0, n), 120) * 4
+    swell = 0.7 + 0.3 * np.sin(2 * np.pi * 0.25 * t)
+    return _norm((x + rumble) * swell * _envelope(n, duration * 0.25, duration * 0.3))
+
+
+def stinger(duration=1.2, rng=None):
+    rng = rng or np.random.default_rng()
+    t = _t(duration)
+    n = len(t)
+    #dissonant cluster a semitone apart on top of a falling sub thump
+    cluster = sum(np.sin(2 * np.pi * f * t) for f in (311.1, 329.6, 349.2, 466.2, 493.9))
+    thump = np.sin(_osc(40 + 80 * np.exp(-t * 12))) * 2
+    hit = rng.uniform(-1.0, 1.0, n) * np.exp(-t * 40)
+    decay = np.exp(-t * 3.5)
+    return _norm(np.tanh(1.5 * (cluster + thump + hit)) * decay * _envelope(n, 0.002, 0.05))
+
+
+SOUNDS = {
+    'static': static,
+    'scream': scream,
+    'drone': drone,
+    'stinger': stinger,
+}
+
+
+def to_pcm(x):
+    return (np.clip(x, -1.0, 1.0) * 32767).astype('<i2')
+
+
+def wav_bytes(pcm, rate=RATE, n_chan=1):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(n_chan)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def render(name):
+    with _lock:
+        pcm = _cache.get(name)
+        if pcm is None:
+            pcm = _cache[name] = to_pcm(SOUNDS[name]())
+    return pcm
+
@@ -0,0 +1,144 @@
+import wave
+
+import numpy as np
+import pytest
+
+import audio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(audio, 'time', c)
+    return c
+
+
+def tone(value, seconds):
+    return np.full((int(seconds * audio.RATE), audio.CHANNELS), value, np.float32)
+
+
+def test_conform_mono_to_stereo_and_resample():
+    x = np.linspace(-1, 1, 1000, dtype=np.float32)
+    out = audio.conform(x, audio.RATE // 2)
+    assert out.shape == (2000, audio.CHANNELS)
+    assert out.dtype == np.float32
+    assert np.allclose(out[:, 0], out[:, 1])
+
+
+def test_overlapping_voices_sum_from_playheads(clock):
+    backend = audio.NullBackend()
+    m = audio.Mixer(backend)
+    m.play(tone(0.25, 1.0))
+    clock.now += 0.5
+    m.play(tone(0.25, 1.0))
+    # the first voice has half a second left, the second a full one
+    assert len(m.voices) == 2
+    pcm = m.render(clock.now)
+    assert len(pcm) == audio.RATE
+    half = audio.RATE // 2
+    assert abs(pcm[10, 0] - int(0.5 * 32767)) <= 1
+    assert abs(pcm[half + 10, 0] - int(0.25 * 32767)) <= 1
+    assert backend.plays == 2
+
+
+def test_mix_is_clipped(clock):
+    m = audio.Mixer(audio.NullBackend())
+    m.play(tone(0.8, 0.1))
+    m.play(tone(0.8, 0.1))
+    assert m.render(clock.now).max() == 32767
+
+
+def test_voice_cap_drops_oldest(clock):
+    m = audio.Mixer(audio.NullBackend(), max_voices=3)
+    vs = [m.play(tone(0.1, 1.0)) for _ in range(5)]
+    assert m.voices == vs[-3:]
+
+
+def test_finished_voices_are_dropped(clock):
+    m = audio.Mixer(audio.NullBackend())
+    m.play(tone(0.1, 0.1))
+    clock.now += 0.2
+    v = m.play(tone(0.1, 0.1))
+    assert m.voices == [v]
+
+
+def test_stop_voice_keeps_the_others(clock):
+    backend = audio.NullBackend()
+    m = audio.Mixer(backend)
+    a = m.play(tone(0.25, 1.0))
+    b = m.play(tone(0.5, 1.0))
+    m.stop(a)
+    assert m.voices == [b]
+    assert abs(m.render(clock.now)[0, 0] - int(0.5 * 32767)) <= 1
+    # stopping twice, or None, is a no-op
+    plays = backend.plays
+    m.stop(a)
+    m.stop(None)
+    assert backend.plays == plays
+
+
+def test_wav_sink_timeline(clock, tmp_path):
+    path = tmp_path / "out.wav"
+    backend = audio.WavFileBackend(str(path))
+    m = audio.Mixer(backend)
+    a = m.play(tone(0.25, 1.0))
+    clock.now += 0.5
+    b = m.play(tone(0.25, 1.0))
+    clock.now += 0.25
+    m.stop(a)
+    clock.now += 0.25
+    m.stop(b)
+    backend.close()
+
+    with wave.open(str(path), 'rb') as wf:
+        assert wf.getnchannels() == audio.CHANNELS
+        assert wf.getframerate() == audio.RATE
+        x = np.frombuffer(wf.readframes(wf.getnframes()), '<i2').reshape(-1, audio.CHANNELS)[:, 0]
+    q = audio.RATE // 4
+    # one voice, then both, then only the second, then silence cut at the last stop
+    assert len(x) == 4 * q
+    one, two = int(0.25 * 32767), int(0.5 * 32767)
+    assert abs(int(x[q]) - one) <= 1
+    assert abs(int(x[2 * q + 10]) - two) <= 1
+    assert abs(int(x[3 * q + 10]) - one) <= 1
+
+
+def test_stop_all(clock, tmp_path):
+    backend = audio.WavFileBackend(str(tmp_path / "out.wav"))
+    m = audio.Mixer(backend)
+    m.play(tone(0.25, 1.0))
+    clock.now += 0.1
+    m.stop_all()
+    assert m.voices == []
+    backend.close()
+    with wave.open(str(tmp_path / "out.wav"), 'rb') as wf:
+        assert abs(wf.getnframes() - int(0.1 * audio.RATE)) <= 1
+
+
+def test_bank_decodes_once(tmp_path):
+    path = str(tmp_path / "s.wav")
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(audio.RATE)
+        wf.writeframes(np.full(100, 16384, '<i2').tobytes())
+    bank = audio.AudioBank()
+    buf = bank.get(path)
+    assert buf.shape == (100, audio.CHANNELS)
+    assert np.allclose(buf, 0.5)
+    assert bank.get(path) is buf
+
+
+def test_make_backend():
+    assert isinstance(audio.make_backend("null"), audio.NullBackend)
+    assert isinstance(audio.make_backend("wav:x.wav"), audio.WavFileBackend)
+    with pytest.raises(ValueError):
+        audio.make_backend("nope")
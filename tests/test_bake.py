@@ -0,0 +1,54 @@
+import os
+
+from PIL import Image
+
+import bake
+
+
+def make(tmp_path, n=3):
+    paths = []
+    for i in range(n):
+        p = str(tmp_path / f"{i}.png")
+        Image.new('RGB', (20 + i, 10), (i * 40, 0, 0)).save(p)
+        paths.append(p)
+    return paths
+
+
+def baked(tmp_path):
+    return bake.BakedImages(str(tmp_path / "b.json"), str(tmp_path / "b"))
+
+
+def test_bake_and_get(tmp_path):
+    paths = make(tmp_path)
+    b = baked(tmp_path)
+    assert b.bake([(p, (8, 8), 'fit') for p in paths], workers=1) == 3
+    img = b.get(paths[1], (8, 8), 'fit')
+    assert img.size == (8, 8)
+    assert img.getpixel((0, 0))[0] == 40
+    # nothing stale, nothing to do
+    assert b.bake([(p, (8, 8), 'fit') for p in paths], workers=1) == 0
+
+
+def test_reopen_uses_the_index(tmp_path):
+    paths = make(tmp_path)
+    baked(tmp_path).bake([(p, (8, 8), 'fit') for p in paths], workers=1)
+    assert baked(tmp_path).get(paths[0], (8, 8), 'fit') is not None
+
+
+def test_missing_blob_starts_a_new_generation(tmp_path):
+    paths = make(tmp_path)
+    jobs = [(p, (8, 8), 'fit') for p in paths]
+    b = baked(tmp_path)
+    b.bake(jobs, workers=1)
+    os.remove(b.blob)
+    b = baked(tmp_path)
+    assert b.bake(jobs, workers=1) == 3
+    assert os.path.exists(b.blob)
+    assert all(b.get(p, (8, 8), 'fit') is not None for p in paths)
+
+
+def test_count_is_what_was_written(tmp_path):
+    paths = make(tmp_path, 2)
+    b = baked(tmp_path)
+    os.remove(paths[1])
+    assert b.bake([(p, (8, 8), 'fit') for p in paths], workers=1) == 1
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+import capture
+
+
+@pytest.fixture
+def ring():
+    r = capture.Ring(capacity=8, create=True)
+    yield r
+    r.close(unlink=True)
+
+
+def test_read_in_order(ring):
+    for i in range(5):
+        ring.write(capture.MOVE, i, -i, t=float(i))
+    assert ring.read() == [(float(i), capture.MOVE, i, -i) for i in range(5)]
+    assert ring.read() == []
+
+
+def test_lapped_reader_skips_what_it_lost(ring):
+    for i in range(20):
+        ring.write(capture.KEY, i % 5, 0, t=float(i))
+    out = ring.read()
+    # the oldest slot left may be the one the writer is filling next, so it is not trusted
+    assert [r[0] for r in out] == [float(i) for i in range(13, 20)]
+    assert ring.dropped == 13
+
+
+def test_record_being_overwritten_is_not_handed_out(ring, monkeypatch):
+    for i in range(8):
+        ring.write(capture.MOVE, i, 0, t=float(i))
+    record = capture.RECORD
+
+    class Racing:
+        # while the reader copies, the writer fills index 8 (the slot of record 0) without
+        # having bumped the write index yet
+        size = record.size
+        pack_into = record.pack_into
+
+        def unpack_from(self, buf, off):
+            if off == capture.HEADER_SIZE + 7 * record.size:
+                record.pack_into(buf, capture.HEADER_SIZE, 99.0, 77, 12345, 0)
+            return record.unpack_from(buf, off)
+
+    monkeypatch.setattr(capture, 'RECORD', Racing())
+    out = ring.read()
+    assert all(r[1] == capture.MOVE for r in out)
+    assert [r[0] for r in out] == [float(i) for i in range(1, 8)]
+
+
+def test_concurrent_writers_lose_nothing():
+    r = capture.Ring(capacity=1 << 16, create=True)
+    try:
+        got, done = [0], threading.Event()
+
+        def reader():
+            while not done.is_set():
+                got[0] += len(r.read())
+            got[0] += len(r.read())
+
+        rt = threading.Thread(target=reader)
+        rt.start()
+        ws = [threading.Thread(target=lambda: [r.write(capture.MOVE, i, 0) for i in range(50000)]) for _ in range(2)]
+        for w in ws: w.start()
+        for w in ws: w.join()
+        done.set()
+        rt.join()
+        assert got[0] == 100000
+        assert r.dropped == 0
+    finally:
+        r.close(unlink=True)
+
+
+@pytest.mark.parametrize("kind,x,ok", [
+    (capture.MOVE, -5, True), (capture.CLICK, 10, True),
+    (capture.KEY, 0, True), (capture.KEY, len(capture.KEY_CLASSES), False), (capture.KEY, -1, False),
+    (capture.ROLL, capture.ROLL_SCALE - 1, True), (capture.ROLL, -1, False),
+    (0, 0, False), (99, 0, False),
+])
+def test_valid(kind, x, ok):
+    assert capture.valid(kind, x) == ok
+
+
+def test_key_class():
+    class K:
+        def __init__(self, name): self.name = name
+    assert capture.key_class(object()) == 'char'
+    assert capture.key_class(K('shift_r')) == 'modifier'
+    assert capture.key_class(K('media_play_pause')) == 'media'
+    assert capture.key_class(K('f5')) == 'function'
+    assert capture.key_class(K('enter')) == 'other'
@@ -0,0 +1,77 @@
+import queue
+
+import pytest
+from PIL import Image
+
+import nudge
+
+
+class Canvas:
+    def __init__(self):
+        self.items = []
+
+    def delete(self, tag):
+        self.items = []
+
+    def config(self, **kw):
+        pass
+
+    def create_image(self, *a, **kw):
+        self.items.append('image')
+        return len(self.items)
+
+    def create_oval(self, *a, **kw):
+        self.items.append('face')
+
+    create_polygon = create_oval
+
+
+class Root:
+    def __init__(self):
+        self.errors = []
+
+    def report_callback_exception(self, *exc):
+        self.errors.append(exc[0])
+
+    def after_idle(self, fn, *args):
+        pass
+
+
+@pytest.fixture
+def gui(tmp_path, monkeypatch):
+    # PIL is normally imported by load_modules(), which also needs win32
+    monkeypatch.setattr(nudge, 'Image', Image, raising=False)
+    m = nudge.Manager(queue.Queue())
+    paths = []
+    for i in range(5):
+        p = str(tmp_path / f"{i}.png")
+        Image.new('RGB', (8, 8)).save(p)
+        paths.append(p)
+    m.i_paths[:] = paths
+    g = object.__new__(nudge.GUI)
+    g.m = m
+    g.root = Root()
+    g.primary = nudge.Monitor(0, 0, 16, 16, None)
+    g.monitors = [g.primary]
+    g.anim = None
+    return g
+
+
+def test_tk_failure_shows_the_face_and_quarantines_nothing(gui, monkeypatch):
+    def broken(p, screen):
+        raise MemoryError("PhotoImage")
+    monkeypatch.setattr(gui.m.img_cache, 'photo', broken)
+    c = Canvas()
+    gui.show_content(c)
+    assert 'face' in c.items
+    assert len(gui.m.i_paths) == 5
+    assert gui.root.errors == [MemoryError]
+
+
+def test_bad_files_are_quarantined_with_one_retry(gui):
+    for p in gui.m.i_paths:
+        open(p, 'w').write("not an image")
+    c = Canvas()
+    gui.show_content(c)
+    assert 'face' in c.items
+    assert len(gui.m.i_paths) == 3
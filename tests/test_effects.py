@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+import effects
+
+
+@pytest.fixture
+def pool():
+    p = effects.EffectPool(workers=2, max_pending=2)
+    yield p
+    p.shutdown(timeout=1)
+
+
+def test_submit_runs_off_thread(pool):
+    f = pool.submit(threading.get_ident)
+    assert f.result(1) != threading.get_ident()
+    assert pool.stats()['submitted'] == 1
+
+
+def test_full_pool_rejects_instead_of_queueing(pool):
+    gate = threading.Event()
+    held = [pool.submit(gate.wait, 2) for _ in range(2)]
+    f = pool.submit(lambda: None)
+    with pytest.raises(RuntimeError, match="full"):
+        f.result(0)
+    gate.set()
+    for h in held:
+        h.result(1)
+    assert pool.stats()['rejected'] == 1
+
+
+def test_apply_reverts_after_hold(pool):
+    log = []
+    c = pool.apply("flip", lambda: log.append('do') or 'old', lambda s: log.append(('undo', s)), hold=0.05)
+    assert c.applied.result(1) == 'old'
+    assert c.reverted.result(1) == 'old'
+    assert log == ['do', ('undo', 'old')]
+    assert pool.stats()['journal'] == []
+
+
+def test_noop_change_resolves_without_undo(pool):
+    undo = []
+    c = pool.apply("warp", lambda: None, undo.append, hold=10)
+    assert c.reverted.result(1) is None
+    assert undo == []
+
+
+def test_failed_do_resolves(pool):
+    c = pool.apply("warp", lambda: 1 / 0, lambda s: None, hold=10)
+    with pytest.raises(ZeroDivisionError):
+        c.applied.result(1)
+    assert c.reverted.result(1) is None
+
+
+def test_revert_early_runs_once(pool):
+    undo = []
+    c = pool.apply("flip", lambda: 'old', undo.append, hold=10)
+    c.applied.result(1)
+    assert pool.revert(c).result(1) == 'old'
+    pool.revert(c)
+    assert undo == ['old']
+
+
+def test_failed_undo_is_reported(pool):
+    def undo(s):
+        raise OSError("driver")
+    c = pool.apply("flip", lambda: 'old', undo, hold=0)
+    with pytest.raises(OSError):
+        c.reverted.result(1)
+
+
+def test_shutdown_undoes_the_journal_newest_first():
+    p = effects.EffectPool()
+    undo = []
+    cs = [p.apply(n, lambda n=n: n, undo.append, hold=60) for n in ("a", "b", "c")]
+    for c in cs:
+        c.applied.result(1)
+    p.shutdown(timeout=1)
+    assert undo == ["c", "b", "a"]
+    assert all(c.reverted.done() for c in cs)
+    with pytest.raises(RuntimeError, match="closed"):
+        p.submit(lambda: None).result(0)
+
+
+def test_shutdown_waits_for_inflight_changes():
+    p = effects.EffectPool()
+    gate = threading.Event()
+    undo = []
+
+    def slow():
+        gate.wait(1)
+        return 'old'
+
+    c = p.apply("flip", slow, undo.append, hold=60)
+    threading.Timer(0.05, gate.set).start()
+    p.shutdown(timeout=2)
+    assert undo == ['old']
+    assert c.reverted.result(1) == 'old'
@@ -0,0 +1,33 @@
+from PIL import Image
+
+import nudge
+
+
+class Photo:
+    def __init__(self, img):
+        self.size = img.size
+
+
+def test_photo_of_an_evicted_entry_does_not_leak_budget(monkeypatch):
+    cache = nudge.ImageCache(budget=10 ** 9)
+    img = Image.new('RGB', (10, 10))
+    cache.put(('a', (10, 10)), img)
+
+    class EvictingPhoto(Photo):
+        # the asset watcher's warm() replaces the entry while the PhotoImage is being built
+        def __init__(self, i):
+            super().__init__(i)
+            cache.put(('a', (10, 10)), Image.new('RGB', (10, 10)))
+
+    monkeypatch.setattr(nudge, 'ImageTk', type('ImageTk', (), {'PhotoImage': EvictingPhoto}), raising=False)
+    cache.photo('a', (10, 10))
+    assert cache.used == sum(e[2] for e in cache.entries.values())
+
+
+def test_photo_bytes_are_counted(monkeypatch):
+    monkeypatch.setattr(nudge, 'ImageTk', type('ImageTk', (), {'PhotoImage': Photo}), raising=False)
+    cache = nudge.ImageCache(budget=10 ** 9)
+    cache.put(('a', (10, 10)), Image.new('RGB', (10, 10)))
+    cache.photo('a', (10, 10))
+    assert cache.used == 10 * 10 * 3 + 10 * 10 * 4
+    assert cache.stats()['hits'] == 1
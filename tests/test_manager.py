@@ -0,0 +1,45 @@
+import queue
+
+import pytest
+
+import nudge
+
+
+class NullKeyboard:
+    def type(self, s): pass
+
+
+@pytest.fixture
+def m():
+    m = nudge.Manager(queue.Queue(), kb_c=NullKeyboard())
+    m.tracer.jsonl = m.tracer.prom = None
+    m.mode = "input"
+    m.is_active = True
+    return m
+
+
+@pytest.mark.parametrize("first", ['typing_possession', 'rps_game'])
+def test_dont_move_never_overlaps_focus_events(m, first):
+    assert m.trigger(first)
+    assert not m.trigger('dont_move')
+    m.finish_event(first)
+    assert m.trigger('dont_move')
+    assert not m.trigger(first)
+
+
+def test_disjoint_slots_run_side_by_side(m):
+    assert m.trigger('jumpscare')
+    assert m.trigger('screen_flip')
+    assert not m.trigger('entity')
+
+
+def test_typist_keys_do_not_roll(m):
+    m.sampler.set_chance('jumpscare', 1)
+    assert m.trigger('typing_possession')
+    n = m.q.qsize()
+    for _ in range(50):
+        m.on_press(object())
+    assert m.q.qsize() == n
+    m.finish_event('typing_possession')
+    m.on_press(object())
+    assert m.q.qsize() == n + 1
@@ -0,0 +1,48 @@
+import time
+
+import profiler
+
+
+class Handlers:
+    def create_thing(self):
+        def cb():
+            return [bytearray(1000) for _ in range(100)]
+        keep = []
+        end = time.perf_counter() + 0.2
+        while time.perf_counter() < end:
+            keep.append(cb())
+        return keep
+
+    def helper(self):
+        pass
+
+
+class Worker:
+    def build(self):
+        keep = []
+        end = time.perf_counter() + 0.1
+        while time.perf_counter() < end:
+            keep.append(bytearray(1000))
+        return keep
+
+
+def test_handler_codes():
+    names = set(profiler.handler_codes((Handlers,), whole=(Worker,)).values())
+    assert names == {'Handlers.create_thing', 'Worker.build'}
+
+
+def test_samples_and_allocations_are_attributed(tmp_path):
+    p = profiler.Profiler((Handlers,), str(tmp_path / "prof"), whole=(Worker,))
+    assert not p.running
+    p.start()
+    a = Handlers().create_thing()
+    b = Worker().build()
+    report, folded = p.stop()
+    assert not p.running
+    by_handler = {h: n for (_, h), n in p.handlers.items()}
+    assert by_handler['Handlers.create_thing'] > by_handler.get('Worker.build', 0) > 0
+    text = open(report).read()
+    assert "Handlers.create_thing" in text and "live allocations by handler" in text
+    assert "create_thing;cb" in open(folded).read()
+    assert p.stop() is None
+    del a, b
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+import nudge
+
+CHANCES = [('a', 4, None), ('b', 2, 'key'), ('c', 10, None)]
+
+
+def cascade(chances, tags):
+    # the original roll: each event in turn gets a 1-in-chance shot, stopping at the first hit
+    probs, left = {}, 1.0
+    for event, chance, tag in chances:
+        if tag and tag not in tags:
+            continue
+        probs[event] = probs.get(event, 0.0) + left / chance
+        left -= left / chance
+    probs[None] = left
+    return probs
+
+
+@pytest.mark.parametrize("tags", [frozenset(), frozenset({'key'})])
+def test_probabilities_match_the_cascade(tags):
+    s = nudge.EventSampler(CHANCES)
+    got = s.probabilities(tags)
+    want = cascade(CHANCES, tags)
+    assert got.keys() == want.keys()
+    for k in want:
+        assert got[k] == pytest.approx(want[k])
+    assert sum(got.values()) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("tags", [frozenset(), frozenset({'key'}), frozenset({'typing', 'no_popup'}),
+                                  frozenset({'key', 'typing', 'no_popup'})])
+def test_real_table_matches_the_cascade(tags):
+    s = nudge.EventSampler()
+    got = s.probabilities(tags)
+    want = cascade(nudge.HORROR_CHANCES, tags)
+    for k in want:
+        assert got[k] == pytest.approx(want[k])
+
+
+def test_one_table_per_tag_combination():
+    s = nudge.EventSampler()
+    tags = {t for _, _, t in nudge.HORROR_CHANCES if t}
+    assert len(s.tables) == 2 ** len(tags)
+
+
+def test_sample_walks_the_table():
+    s = nudge.EventSampler(CHANCES)
+    tags = frozenset({'key'})
+    assert s.sample(tags, 0.0) == 'a'
+    assert s.sample(tags, 0.3) == 'b'
+    assert s.sample(tags, 0.99) is None
+    assert s.sample(frozenset(), 0.3) == 'c'
+    assert s.sample(frozenset(), 0.5) is None
+
+
+def test_sample_frequencies():
+    random.seed(11)
+    s = nudge.EventSampler(CHANCES)
+    tags = frozenset({'key'})
+    n = 40000
+    counts = {}
+    for _ in range(n):
+        e = s.sample(tags)
+        counts[e] = counts.get(e, 0) + 1
+    for k, p in s.probabilities(tags).items():
+        assert counts.get(k, 0) / n == pytest.approx(p, abs=0.01)
+
+
+def test_pick_always_picks_an_event():
+    random.seed(5)
+    s = nudge.EventSampler(CHANCES)
+    assert {s.pick(frozenset({'key'})) for _ in range(500)} == {'a', 'b', 'c'}
+    assert nudge.EventSampler([('b', 2, 'key')]).pick() is None
+
+
+def test_max_chance_is_the_busiest_table():
+    s = nudge.EventSampler(CHANCES)
+    assert s.max_chance() == pytest.approx(1 - s.probabilities(frozenset({'key'}))[None])
+    assert nudge.EventSampler([]).max_chance() == 0.0
+
+
+def test_set_chance_rebuilds():
+    s = nudge.EventSampler(CHANCES)
+    s.set_chance('a', 1)
+    assert s.probabilities()['a'] == pytest.approx(1.0)
+    assert s.sample(frozenset(), 0.999) == 'a'
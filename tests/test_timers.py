@@ -0,0 +1,151 @@
+import random
+
+import timers
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(**kw):
+    clock = Clock()
+    return clock, timers.TimerWheel(clock=clock, **kw)
+
+
+def run_until(clock, wheel, end, step=None):
+    # drive the wheel the way the GUI does: sleep to the next deadline, or by a fixed step
+    while clock.now < end:
+        nxt = wheel.next_deadline()
+        if step is not None:
+            clock.now = min(end, clock.now + step)
+        elif nxt is None or nxt > end:
+            clock.now = end
+        else:
+            clock.now = max(nxt, clock.now)
+        wheel.advance()
+
+
+def test_fires_in_deadline_order():
+    clock, w = make()
+    fired = []
+    for d in (0.5, 0.1, 0.3):
+        w.call_later(d, fired.append, d)
+    run_until(clock, w, clock.now + 1)
+    assert fired == [0.1, 0.3, 0.5]
+    assert len(w) == 0
+
+
+def test_never_early_and_at_most_one_tick_late():
+    clock, w = make()
+    rng = random.Random(7)
+    late = []
+    start = clock.now
+    for _ in range(2000):
+        due = start + rng.uniform(0, 3000)
+        w.call_at(due, lambda due=due: late.append(clock.now - due))
+    run_until(clock, w, start + 3001)
+    assert len(late) == 2000
+    assert min(late) >= -1e-9
+    assert max(late) <= w.step + 1e-9
+
+
+def test_irregular_advance():
+    clock, w = make()
+    rng = random.Random(3)
+    late = []
+    start = clock.now
+    for _ in range(500):
+        due = start + rng.uniform(0, 50)
+        w.call_at(due, lambda due=due: late.append(clock.now - due))
+    while clock.now < start + 51:
+        clock.now += rng.uniform(0, 0.3)
+        w.advance()
+    assert len(late) == 500
+    assert min(late) >= -1e-9
+
+
+def test_cancel():
+    clock, w = make()
+    fired = []
+    t = w.call_later(1, fired.append, 'a')
+    w.call_later(2, fired.append, 'b')
+    t.cancel()
+    assert not t.active
+    assert not w.cancel(t)
+    run_until(clock, w, clock.now + 3)
+    assert fired == ['b']
+
+
+def test_overflow_cascades():
+    clock, w = make(slots=4, levels=2)
+    fired = []
+    # 4 ** 2 ticks is the wheel's span; this lands in the overflow
+    w.call_later(w.step * 100, fired.append, 'far')
+    assert w.stats()['overflow'] == 1
+    run_until(clock, w, clock.now + w.step * 99.5)
+    assert fired == []
+    run_until(clock, w, clock.now + w.step)
+    assert fired == ['far']
+
+
+def test_every_runs_from_its_deadline():
+    clock, w = make()
+    t0 = clock.now
+    at = []
+    w.every(1.0, lambda: at.append(clock.now - t0))
+    # a late host loop must not drift the schedule
+    run_until(clock, w, t0 + 5.05, step=0.37)
+    assert len(at) == 5
+    for i, t in enumerate(at, 1):
+        assert i <= t < i + 0.37 + w.step
+
+
+def test_every_skips_missed_periods():
+    clock, w = make()
+    n = []
+    w.every(1.0, lambda: n.append(clock.now))
+    clock.now += 3.5
+    w.advance()
+    clock.now += 0.6
+    w.advance()
+    assert len(n) == 2
+
+
+def test_every_stops_on_false_and_on_self_cancel():
+    clock, w = make()
+    n = []
+
+    def twice():
+        n.append(1)
+        return len(n) < 2
+
+    w.every(0.1, twice)
+    box = []
+    box.append(w.every(0.1, lambda: box[0].cancel()))
+    run_until(clock, w, clock.now + 1)
+    assert len(n) == 2
+    assert len(w) == 0
+
+
+def test_errors_go_to_on_error():
+    clock, w = make()
+    errors = []
+    w.on_error = lambda *exc: errors.append(exc[0])
+    w.every(0.1, lambda: 1 / 0)
+    w.call_later(0.2, lambda: None)
+    run_until(clock, w, clock.now + 1)
+    assert errors == [ZeroDivisionError]
+    assert len(w) == 0
+
+
+def test_next_deadline_and_pending():
+    clock, w = make()
+    assert w.next_deadline() is None
+    w.call_later(2, lambda: None, name="b")
+    w.call_later(0.5, lambda: None, name="a")
+    assert abs(w.next_deadline() - (clock.now + 0.5)) <= w.step
+    assert [name for _, name, _ in w.pending()] == ["a", "b"]
@@ -0,0 +1,116 @@
+import sys
+import threading
+
+import pytest
+
+import windows
+
+
+def make(wins=((1, "Notepad"), (2, "Explorer"), (3, "NUDGE popup"), (4, ""))):
+    backend = windows.FakeBackend(wins)
+    reg = windows.WindowRegistry(backend)
+    reg.start()
+    return backend, reg
+
+
+def check_index(reg):
+    assert len(reg.items) == len(reg.index)
+    for i, hwnd in enumerate(reg.items):
+        assert reg.index[hwnd] == i
+
+
+def test_start_keeps_only_eligible():
+    _, reg = make()
+    assert sorted(reg.items) == [1, 2]
+    check_index(reg)
+
+
+def test_open_close_and_hide():
+    backend, reg = make()
+    backend.open(5, "Browser")
+    backend.open(6, "Hidden", visible=False)
+    assert sorted(reg.items) == [1, 2, 5]
+    backend.close(1)
+    backend.open(2, "Explorer", visible=False)
+    assert reg.items == [5]
+    check_index(reg)
+
+
+def test_stopped_backend_stops_updating():
+    backend, reg = make()
+    reg.stop()
+    backend.open(5, "Browser")
+    assert 5 not in reg.index
+
+
+def test_pick_excludes_foreground():
+    _, reg = make()
+    for _ in range(200):
+        assert reg.pick(exclude=1) == 2
+
+
+def test_pick_covers_everything_else():
+    backend, reg = make(((h, f"w{h}") for h in range(10)))
+    seen = {reg.pick(exclude=0) for _ in range(2000)}
+    assert seen == set(range(1, 10))
+
+
+@pytest.mark.parametrize("wins", [(), ((1, "Only"),)])
+def test_pick_nothing_eligible(wins):
+    _, reg = make(wins)
+    assert reg.pick(exclude=1) is None
+
+
+def test_replace_diffs():
+    _, reg = make()
+    reg.replace([2, 7, 8])
+    assert sorted(reg.items) == [2, 7, 8]
+    check_index(reg)
+
+
+def test_replace_during_updates():
+    _, reg = make(())
+    stop = threading.Event()
+    errors = []
+
+    def churn():
+        h = 1000
+        while not stop.is_set():
+            reg.add(h)
+            reg.discard(h - 50)
+            h += 1
+
+    def resync():
+        try:
+            for i in range(300):
+                reg.replace(range(i, i + 100))
+        except Exception as e:
+            errors.append(e)
+
+    # switch threads as often as possible so the churn lands inside replace()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    t = threading.Thread(target=churn)
+    t.start()
+    try:
+        resync()
+    finally:
+        stop.set()
+        t.join()
+        sys.setswitchinterval(interval)
+    assert not errors
+    check_index(reg)
+
+
+def test_fake_activate():
+    backend, _ = make()
+    backend.activate(2)
+    assert backend.foreground() == 2
+    with pytest.raises(OSError):
+        backend.activate(99)
+
+
+def test_make_backend():
+    assert isinstance(windows.make_backend("fake"), windows.FakeBackend)
+    with pytest.raises(ValueError):
+        windows.make_backend("nope")
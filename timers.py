@@ -0,0 +1,179 @@
+import sys
+import math
+import time
+import traceback
+
+TIMER_TICK = 0.01
+TIMER_SLOTS = 64
+TIMER_LEVELS = 4
+
+
+class Timer:
+    __slots__ = ('wheel', 'due', 'tick', 'fn', 'args', 'name', 'period', 'bucket', 'level')
+
+    def __init__(self, wheel, due, fn, args, name, period):
+        self.wheel = wheel
+        self.due = due
+        self.fn = fn
+        self.args = args
+        self.name = name or getattr(fn, '__name__', 'timer')
+        self.period = period
+        self.tick = 0
+        self.bucket = None
+        self.level = 0
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+    def cancel(self):
+        self.wheel.cancel(self)
+
+
+class TimerWheel:
+    # hierarchical timing wheel on the monotonic clock; timers landing in the same tick fire in
+    # one pass, and the host only needs a single wakeup at next_deadline()
+    def __init__(self, tick=TIMER_TICK, slots=TIMER_SLOTS, levels=TIMER_LEVELS, clock=time.monotonic):
+        self.step = tick
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        self.origin = clock()
+        self.cur = 0
+        self.wheel = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.overflow = {}
+        self.ready = {}
+        self.counts = [0] * (levels + 1)
+        self.fired = 0
+        self.on_error = None
+
+    def __len__(self):
+        return sum(self.counts) + len(self.ready)
+
+    def call_later(self, delay, fn, *args, name=None):
+        return self.call_at(self.clock() + delay, fn, *args, name=name)
+
+    def call_at(self, due, fn, *args, name=None):
+        t = Timer(self, due, fn, args, name, None)
+        self.insert(t)
+        return t
+
+    def every(self, period, fn, *args, name=None):
+        # re-armed from its own deadline, not from when it ran, so it never drifts;
+        # missed periods are skipped, and returning False from fn stops it
+        t = Timer(self, self.clock() + period, fn, args, name, period)
+        self.insert(t)
+        return t
+
+    def insert(self, t):
+        t.tick = math.ceil((t.due - self.origin) / self.step - 1e-6)
+        diff = t.tick - self.cur
+        if diff <= 0:
+            t.bucket, t.level = self.ready, -1
+        else:
+            for lvl in range(self.levels):
+                span = self.slots ** lvl
+                if diff < span * self.slots:
+                    t.bucket, t.level = self.wheel[lvl][(t.tick // span) % self.slots], lvl
+                    break
+            else:
+                t.bucket, t.level = self.overflow, self.levels
+            self.counts[t.level] += 1
+        t.bucket[t] = None
+
+    def cancel(self, t):
+        # clearing the period also stops a periodic timer from inside its own callback
+        t.period = None
+        return self.unlink(t)
+
+    def unlink(self, t):
+        if t.bucket is None:
+            return False
+        del t.bucket[t]
+        if t.level >= 0:
+            self.counts[t.level] -= 1
+        t.bucket = None
+        return True
+
+    def cascade(self, bucket):
+        timers = list(bucket)
+        for t in timers:
+            self.unlink(t)
+        for t in timers:
+            self.insert(t)
+
+    def advance(self, now=None):
+        now = self.clock() if now is None else now
+        target = math.floor((now - self.origin) / self.step + 1e-6)
+        due = []
+        while self.cur < target:
+            if not any(self.counts):
+                self.cur = target
+                break
+            # whole rounds of empty lower levels are skipped instead of stepped through
+            jump = 1
+            for lvl in range(self.levels):
+                if self.counts[lvl]:
+                    break
+                jump = self.slots ** (lvl + 1)
+            self.cur = min(target, (self.cur // jump + 1) * jump)
+            if self.cur % self.slots ** self.levels == 0 and self.overflow:
+                self.cascade(self.overflow)
+            for lvl in range(self.levels - 1, 0, -1):
+                span = self.slots ** lvl
+                if self.cur % span == 0:
+                    self.cascade(self.wheel[lvl][(self.cur // span) % self.slots])
+            bucket = self.wheel[0][self.cur % self.slots]
+            for t in list(bucket):
+                if t.tick <= self.cur:
+                    self.unlink(t)
+                    due.append(t)
+        for t in list(self.ready):
+            self.unlink(t)
+            due.append(t)
+        due.sort(key=lambda t: t.due)
+        for t in due:
+            self.fired += 1
+            try:
+                again = t.fn(*t.args) is not False
+            except Exception:
+                again = False
+                if self.on_error:
+                    self.on_error(*sys.exc_info())
+                else:
+                    traceback.print_exc()
+            if again and t.period is not None and t.bucket is None:
+                t.due += t.period * max(1, math.ceil((now - t.due) / t.period))
+                self.insert(t)
+        return len(due)
+
+    def next_deadline(self):
+        if self.ready:
+            return self.clock()
+        best = None
+        for lvl in range(self.levels):
+            if not self.counts[lvl]:
+                continue
+            span = self.slots ** lvl
+            pos = self.cur // span
+            for i in range(1, self.slots + 1):
+                bucket = self.wheel[lvl][(pos + i) % self.slots]
+                if bucket:
+                    tick = min(t.tick for t in bucket)
+                    best = tick if best is None else min(best, tick)
+                    break
+        if self.overflow:
+            tick = min(t.tick for t in self.overflow)
+            best = tick if best is None else min(best, tick)
+        return None if best is None else self.origin + best * self.step
+
+    def pending(self, now=None):
+        now = self.clock() if now is None else now
+        timers = list(self.ready) + list(self.overflow)
+        for level in self.wheel:
+            for bucket in level:
+                timers.extend(bucket)
+        return sorted((t.due - now, t.name, t.period) for t in timers)
+
+    def stats(self):
+        return {'pending': len(self), 'fired': self.fired, 'levels': self.counts[:self.levels], 'overflow': self.counts[-1]}
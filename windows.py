@@ -0,0 +1,242 @@
+import sys
+import random
+import threading
+
+WINDOW_REFRESH = 2.0
+WINDOW_RESYNC = 30.0
+WINDOW_EXCLUDE = "NUDGE"
+
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+
+class WindowRegistry:
+    # eligible top-level windows kept in a list plus a position index, so adding, removing
+    # and picking one at random are all constant time
+    def __init__(self, backend):
+        self.backend = backend
+        self.items = []
+        self.index = {}
+        self.lock = threading.Lock()
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, hwnd):
+        with self.lock:
+            self.insert(hwnd)
+
+    def discard(self, hwnd):
+        with self.lock:
+            self.remove(hwnd)
+
+    def insert(self, hwnd):
+        if hwnd in self.index:
+            return
+        self.index[hwnd] = len(self.items)
+        self.items.append(hwnd)
+        self.updates += 1
+
+    def remove(self, hwnd):
+        i = self.index.pop(hwnd, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if i < len(self.items):
+            self.items[i] = last
+            self.index[last] = i
+        self.updates += 1
+
+    def update(self, hwnd, eligible):
+        if eligible:
+            self.add(hwnd)
+        else:
+            self.discard(hwnd)
+
+    def replace(self, hwnds):
+        # diffed under the lock, since hook events keep adding and removing during a resync
+        hwnds = set(hwnds)
+        with self.lock:
+            for hwnd in [h for h in self.index if h not in hwnds]:
+                self.remove(hwnd)
+            for hwnd in hwnds:
+                self.insert(hwnd)
+
+    def pick(self, exclude=None):
+        with self.lock:
+            n = len(self.items)
+            if n == 0 or (n == 1 and self.items[0] == exclude):
+                return None
+            i = random.randrange(n)
+            if self.items[i] == exclude:
+                i = (i + 1 + random.randrange(n - 1)) % n
+            return self.items[i]
+
+    def start(self):
+        self.backend.start(self)
+
+    def stop(self):
+        self.backend.stop()
+
+
+class FakeBackend:
+    # an in-memory desktop for tests and non-Windows runs
+    def __init__(self, windows=()):
+        self.windows = {}
+        self.fg = None
+        self.registry = None
+        for hwnd, title in windows:
+            self.windows[hwnd] = (title, True)
+
+    def eligible(self, hwnd):
+        title, visible = self.windows.get(hwnd, ("", False))
+        return visible and bool(title) and WINDOW_EXCLUDE not in title
+
+    def open(self, hwnd, title, visible=True):
+        self.windows[hwnd] = (title, visible)
+        if self.registry:
+            self.registry.update(hwnd, self.eligible(hwnd))
+
+    def close(self, hwnd):
+        self.windows.pop(hwnd, None)
+        if self.registry:
+            self.registry.discard(hwnd)
+
+    def start(self, registry):
+        self.registry = registry
+        registry.replace(h for h in self.windows if self.eligible(h))
+
+    def stop(self):
+        self.registry = None
+
+    def foreground(self):
+        return self.fg
+
+    def activate(self, hwnd):
+        if hwnd not in self.windows:
+            raise OSError(f"no window {hwnd}")
+        self.fg = hwnd
+
+
+class PollBackend:
+    # re-enumerates the desktop on a background thread at most once per interval
+    def __init__(self, interval=WINDOW_REFRESH):
+        import win32gui
+        import win32con
+        self.gui = win32gui
+        self.con = win32con
+        self.interval = interval
+        self.registry = None
+        self.stopped = threading.Event()
+
+    def eligible(self, hwnd):
+        try:
+            if not self.gui.IsWindowVisible(hwnd):
+                return False
+            title = self.gui.GetWindowText(hwnd)
+        except Exception:
+            return False
+        return bool(title) and WINDOW_EXCLUDE not in title
+
+    def snapshot(self):
+        found = []
+        def collect(hwnd, ctx):
+            if self.eligible(hwnd):
+                found.append(hwnd)
+        self.gui.EnumWindows(collect, None)
+        return found
+
+    def start(self, registry):
+        self.registry = registry
+        registry.replace(self.snapshot())
+        threading.Thread(target=self.loop, daemon=True).start()
+
+    def loop(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.registry.replace(self.snapshot())
+            except Exception:
+                pass
+
+    def stop(self):
+        self.stopped.set()
+
+    def foreground(self):
+        return self.gui.GetForegroundWindow()
+
+    def activate(self, hwnd):
+        self.gui.ShowWindow(hwnd, self.con.SW_RESTORE)
+        self.gui.SetForegroundWindow(hwnd)
+
+
+class HookBackend(PollBackend):
+    # WinEvent hooks report shows, hides, destroys and title changes as they happen;
+    # the enumeration only runs as a slow resync in case an event was missed
+    EVENTS = (
+        (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE),
+        (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+    )
+
+    def __init__(self, interval=WINDOW_RESYNC):
+        super().__init__(interval)
+        import ctypes
+        from ctypes import wintypes
+        self.ct = ctypes
+        self.wt = wintypes
+        self.user32 = ctypes.windll.user32
+        self.user32.SetWinEventHook.restype = wintypes.HANDLE
+        self.user32.GetAncestor.argtypes = (wintypes.HWND, wintypes.UINT)
+        self.user32.GetAncestor.restype = wintypes.HWND
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                       wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self.proc = proc_type(self.on_event)
+        self.thread_id = None
+
+    def start(self, registry):
+        super().start(registry)
+        threading.Thread(target=self.pump, daemon=True).start()
+
+    def pump(self):
+        # out-of-context hooks are delivered through this thread's message loop
+        self.thread_id = self.ct.windll.kernel32.GetCurrentThreadId()
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [self.user32.SetWinEventHook(lo, hi, None, self.proc, 0, 0, flags) for lo, hi in self.EVENTS]
+        msg = self.wt.MSG()
+        while self.user32.GetMessageW(self.ct.byref(msg), None, 0, 0) > 0:
+            self.user32.TranslateMessage(self.ct.byref(msg))
+            self.user32.DispatchMessageW(self.ct.byref(msg))
+        for h in hooks:
+            if h:
+                self.user32.UnhookWinEvent(h)
+
+    def on_event(self, hook, event, hwnd, id_object, id_child, thread, ms):
+        if not hwnd or id_object != 0 or id_child != 0:
+            return
+        if event == EVENT_OBJECT_DESTROY:
+            self.registry.discard(hwnd)
+        elif self.user32.GetAncestor(hwnd, GA_ROOT) == hwnd:
+            self.registry.update(hwnd, self.eligible(hwnd))
+
+    def stop(self):
+        super().stop()
+        if self.thread_id:
+            self.user32.PostThreadMessageW(self.thread_id, WM_QUIT, 0, 0)
+
+
+def make_backend(name=None):
+    if name is None:
+        name = "hook" if sys.platform == "win32" else "fake"
+    if name == "hook":
+        return HookBackend()
+    if name == "poll":
+        return PollBackend()
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"unknown window backend {name!r}")